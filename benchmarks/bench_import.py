@@ -0,0 +1,139 @@
+"""
+Import-time benchmark.
+
+Every module is imported in fresh interpreters (bytecode is compiled once beforehand,
+so compilation is not measured) and the median import time is reported:
+
+    python benchmarks/bench_import.py --save-baseline import_baseline.json
+    python benchmarks/bench_import.py --baseline import_baseline.json --threshold 0.25
+
+Exits with non-zero code if a module imports one of HEAVY_MODULES that it is not
+allowed to, or, with --baseline, if its import got slower by more than threshold.
+"""
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# dependencies that have to be imported on first use only
+HEAVY_MODULES = ("requests", "urllib3", "bs4", "lxml", "aiohttp", "pyarrow", "msgpack",
+                 "concurrent.futures", "sqlite3", "logging")
+
+# module -> heavy modules it may import eagerly
+MODULES = {"cambridge_metrics":   (),
+           "cambridge_cache":     (),
+           "cambridge_parser":    (),
+           "cambridge_export":    (),
+           "cambridge_batch":     ("concurrent.futures", "logging"),
+           "cambridge_dump":      ("concurrent.futures", "logging", "sqlite3"),
+           "cambridge_assets":    ("concurrent.futures", "logging", "sqlite3", "requests", "urllib3"),
+           "cambridge_async":     ("concurrent.futures", "logging", "aiohttp"),
+           "cambridge_transport": ("logging", "requests", "urllib3"),
+           "cambridge_server":    ("logging", "requests", "urllib3")}
+
+CHILD_CODE = """\
+import sys, time
+started_at = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started_at
+print(elapsed)
+print(" ".join(sys.modules))
+"""
+
+
+def import_once(module: str, write_bytecode: bool = False) -> tuple[float, set[str]]:
+    """
+    Imports module in a new interpreter. Returns (seconds, names of all imported modules)
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    args = [sys.executable] + ([] if write_bytecode else ["-B"]) + ["-c", CHILD_CODE.format(module=module)]
+    completed = subprocess.run(args, cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True)
+    elapsed, imported = completed.stdout.splitlines()
+    return float(elapsed), set(imported.split())
+
+
+def bench_module(module: str, repeat: int) -> Optional[dict]:
+    """
+    Returns None if module can't be imported (e.g. its optional dependency is not installed)
+    """
+    try:
+        _, imported = import_once(module, write_bytecode=True)
+    except subprocess.CalledProcessError:
+        return None
+    timings = [import_once(module)[0] for _ in range(repeat)]
+    return {"import_ms": statistics.median(timings) * 1000,
+            "min_ms":    min(timings) * 1000,
+            "heavy":     sorted(name for name in HEAVY_MODULES if name in imported)}
+
+
+def find_regressions(report: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for module, metrics in report.items():
+        base_metrics = baseline.get(module)
+        if base_metrics is None:
+            continue
+        if metrics["import_ms"] > base_metrics["import_ms"] * (1 + threshold):
+            regressions.append(f"{module}: import_ms {metrics['import_ms']:.2f} > {base_metrics['import_ms']:.2f}")
+    return regressions
+
+
+def run(modules: list[str],
+        repeat: int,
+        baseline_path: Optional[str],
+        save_baseline_path: Optional[str],
+        threshold: float) -> int:
+    report = {}
+    failed = False
+    for module in modules:
+        metrics = bench_module(module, repeat)
+        if metrics is None:
+            print(f"{module:<20} can't be imported, skipped", file=sys.stderr)
+            continue
+        report[module] = metrics
+        print(f"{module:<20} {metrics['import_ms']:7.2f} ms  min {metrics['min_ms']:7.2f} ms  "
+              f"heavy: {', '.join(metrics['heavy']) or '-'}")
+        unexpected = set(metrics["heavy"]) - set(MODULES.get(module, ()))
+        if unexpected:
+            failed = True
+            print(f"EAGER IMPORT {module}: {', '.join(sorted(unexpected))}", file=sys.stderr)
+
+    if save_baseline_path is not None:
+        with open(save_baseline_path, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=4)
+
+    if baseline_path is not None:
+        with open(baseline_path, encoding="utf-8") as baseline_file:
+            regressions = find_regressions(report, json.load(baseline_file), threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time benchmark")
+    parser.add_argument("--module", action="append", choices=list(MODULES),
+                        help="module to benchmark (can be repeated); all by default")
+    parser.add_argument("--repeat", type=int, default=15, help="number of fresh interpreters per module")
+    parser.add_argument("--baseline", help="report to compare with")
+    parser.add_argument("--save-baseline", help="where to save the report")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    return run(args.module or list(MODULES),
+               args.repeat,
+               args.baseline,
+               args.save_baseline,
+               args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Offline parsing benchmark.
+
+Pages of the corpus (corpus.json) are stored in fixtures/ (in the layout of
+cambridge_transport.FixtureStore) and parsed by every backend without network:
+
+    python benchmarks/bench_parse.py run --save-baseline baseline.json
+    python benchmarks/bench_parse.py run --baseline baseline.json --threshold 0.1
+
+With --baseline, exits with non-zero code if pages/sec dropped or peak memory grew
+by more than threshold compared to the baseline.
+
+Committed fixtures are synthetic pages (see synthetic_pages.py) made with `synthesize`, because
+pages of the site can't be redistributed. Real pages can be recorded over them locally with
+
+    python benchmarks/bench_parse.py record --overwrite
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+from typing import Optional, get_args
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from cambridge_parser import BilingualVariations, ParserBackend, fetch_page, get_link, parse_page  # noqa: E402
+from cambridge_transport import Fixture, FixtureStore, make_record_replay_session  # noqa: E402
+from synthetic_pages import make_idiom_page, make_page, make_phrasal_verb_page  # noqa: E402
+
+
+BENCHMARKS_DIR = pathlib.Path(__file__).resolve().parent
+CORPUS_PATH = BENCHMARKS_DIR / "corpus.json"
+FIXTURES_DIR = BENCHMARKS_DIR / "fixtures"
+
+# layouts of synthetic pages: the few huge pages have a fixed number of word entries
+# (in the english dictionary; see synthetic_entries()), the rest are sized by their name
+HUGE_PAGES = {"set": 60, "run": 50, "take": 45}
+PHRASAL_VERBS = {"look-up", "give-up", "put-up-with"}
+IDIOMS = {"break-the-ice", "piece-of-cake"}
+
+
+def split_dictionary(dictionary: str) -> tuple[str, str]:
+    """
+    "english-russian" -> ("english", "russian"); "learner-english" -> ("learner-english", "")
+    """
+    prefix, _, variation = dictionary.partition("-")
+    if prefix == "english" and variation in get_args(BilingualVariations):
+        return "english", variation
+    return dictionary, ""
+
+
+def load_corpus() -> list[tuple[str, str]]:
+    with open(CORPUS_PATH, encoding="utf-8") as corpus_file:
+        corpus = json.load(corpus_file)
+    return [(dictionary, word) for dictionary, words in corpus.items() for word in words]
+
+
+def fixture_link(dictionary: str, word: str) -> str:
+    dictionary_type, bilingual_vairation = split_dictionary(dictionary)
+    return get_link(word, dictionary_type, bilingual_vairation)  # type: ignore
+
+
+def record(delay: float, overwrite: bool) -> None:
+    store = FixtureStore(str(FIXTURES_DIR))
+    session = make_record_replay_session(str(FIXTURES_DIR), mode="record")
+    try:
+        for dictionary, word in load_corpus():
+            if store.get(fixture_link(dictionary, word)) is not None and not overwrite:
+                continue
+            dictionary_type, bilingual_vairation = split_dictionary(dictionary)
+            page = fetch_page(word, dictionary_type=dictionary_type, bilingual_vairation=bilingual_vairation,  # type: ignore
+                              session=session)
+            print(f"recorded {dictionary}/{word}: {len(page)} bytes")
+            time.sleep(delay)
+    finally:
+        session.close()
+
+
+def synthetic_entries(dictionary: str, word: str) -> int:
+    """
+    Number of word entries of the synthetic page. Learner and bilingual dictionaries have
+    half as many as the english one, essential dictionaries a quarter.
+    """
+    if word in HUGE_PAGES:
+        entries = HUGE_PAGES[word]
+    else:
+        entries = 2 + zlib.crc32(f"{dictionary}/{word}".encode("utf-8")) % 8
+    if dictionary.startswith("essential-"):
+        return max(entries // 4, 1)
+    if dictionary != "english":
+        return max(entries // 2, 1)
+    return entries
+
+
+def synthesize(overwrite: bool) -> None:
+    """
+    Stores synthetic pages (see synthetic_pages.py) for corpus entries without fixtures:
+    pv-block pages of PHRASAL_VERBS, idiom-block pages of IDIOMS and word entry pages
+    of the rest (see synthetic_entries()).
+    """
+    store = FixtureStore(str(FIXTURES_DIR))
+    for dictionary, word in load_corpus():
+        link = fixture_link(dictionary, word)
+        if store.get(link) is not None and not overwrite:
+            continue
+        translated = split_dictionary(dictionary)[1] != ""
+        if word in PHRASAL_VERBS:
+            html = make_phrasal_verb_page(word, 2 + zlib.crc32(word.encode("utf-8")) % 4, translated)
+        elif word in IDIOMS:
+            html = make_idiom_page(word, translated)
+        else:
+            html = make_page(word, synthetic_entries(dictionary, word), translated)
+        page = html.encode("utf-8")
+        store.put(link, Fixture(200, "OK", {"Content-Type": "text/html; charset=utf-8"}, page))
+        print(f"synthesized {dictionary}/{word}: {len(page)} bytes")
+
+
+def load_fixtures() -> list[tuple[str, bytes]]:
+    store = FixtureStore(str(FIXTURES_DIR))
+    pages = []
+    missing = []
+    for dictionary, word in load_corpus():
+        fixture = store.get(fixture_link(dictionary, word))
+        if fixture is None or fixture.status != 200:
+            missing.append(f"{dictionary}/{word}")
+            continue
+        pages.append((f"{dictionary}/{word}", fixture.content))
+    if missing:
+        print(f"{len(missing)} of {len(missing) + len(pages)} fixtures are missing "
+              "(run `record` or `synthesize` first)", file=sys.stderr)
+    return pages
+
+
+def count_senses(result: list) -> int:
+    return sum(len(pos_block["data"]["definitions"])
+               for word_info in result
+               for pos_blocks in word_info.values()
+               for pos_block in pos_blocks)
+
+
+def bench_backend(pages: list[tuple[str, bytes]], backend: ParserBackend, repeat: int) -> dict[str, float]:
+    latencies: list[float] = []
+    senses = 0
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for _, page in pages:
+            page_started_at = time.perf_counter()
+            result = parse_page(page, parser_backend=backend)
+            latencies.append(time.perf_counter() - page_started_at)
+            senses += count_senses(result)
+    elapsed = time.perf_counter() - started_at
+
+    # separate pass: tracing allocations slows parsing down
+    peak_memory = 0
+    for _, page in pages:
+        tracemalloc.start()
+        parse_page(page, parser_backend=backend)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {"pages_per_sec":  len(latencies) / elapsed,
+            "senses_per_sec": senses / elapsed,
+            "p50_ms":         quantiles[49] * 1000,
+            "p99_ms":         quantiles[98] * 1000,
+            "peak_memory_mb": peak_memory / 1024 ** 2}
+
+
+def check_backends(pages: list[tuple[str, bytes]], backends: list[ParserBackend]) -> list[str]:
+    """
+    Returns names of pages for which backends give different results
+    """
+    mismatched = []
+    for name, page in pages:
+        results = [parse_page(page, parser_backend=backend) for backend in backends]
+        if any(result != results[0] for result in results[1:]):
+            mismatched.append(name)
+    return mismatched
+
+
+def find_regressions(report: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for backend, metrics in report.items():
+        base_metrics = baseline.get(backend)
+        if base_metrics is None:
+            continue
+        for metric in ("pages_per_sec", "senses_per_sec"):
+            if metrics[metric] < base_metrics[metric] * (1 - threshold):
+                regressions.append(f"{backend}: {metric} {metrics[metric]:.1f} < {base_metrics[metric]:.1f}")
+        for metric in ("p99_ms", "peak_memory_mb"):
+            if metrics[metric] > base_metrics[metric] * (1 + threshold):
+                regressions.append(f"{backend}: {metric} {metrics[metric]:.2f} > {base_metrics[metric]:.2f}")
+    return regressions
+
+
+def run(backends: list[ParserBackend],
+        repeat: int,
+        baseline_path: Optional[str],
+        save_baseline_path: Optional[str],
+        threshold: float) -> int:
+    pages = load_fixtures()
+    if not pages:
+        return 1
+
+    print(f"{len(pages)} pages, {sum(len(page) for _, page in pages) / 1024 ** 2:.1f} MiB")
+    mismatched = check_backends(pages, backends)
+    if mismatched:
+        print(f"backends disagree on: {', '.join(mismatched)}", file=sys.stderr)
+        return 1
+
+    report = {}
+    for backend in backends:
+        report[backend] = metrics = bench_backend(pages, backend, repeat)
+        print(f"{backend:<12} {metrics['pages_per_sec']:8.1f} pages/s {metrics['senses_per_sec']:10.1f} senses/s "
+              f"p50 {metrics['p50_ms']:7.2f} ms  p99 {metrics['p99_ms']:7.2f} ms  "
+              f"peak {metrics['peak_memory_mb']:6.1f} MiB")
+
+    if save_baseline_path is not None:
+        with open(save_baseline_path, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=4)
+
+    if baseline_path is not None:
+        with open(baseline_path, encoding="utf-8") as baseline_file:
+            regressions = find_regressions(report, json.load(baseline_file), threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline parsing benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="download corpus pages into fixtures")
+    record_parser.add_argument("--delay", type=float, default=1.0, help="interval between requests in seconds")
+    record_parser.add_argument("--overwrite", action="store_true", help="re-download existing fixtures")
+
+    synthesize_parser = subparsers.add_parser("synthesize", help="make synthetic fixtures of corpus pages")
+    synthesize_parser.add_argument("--overwrite", action="store_true", help="replace existing fixtures")
+
+    run_parser = subparsers.add_parser("run", help="benchmark parser backends on recorded fixtures")
+    run_parser.add_argument("--backend", action="append", choices=get_args(ParserBackend),
+                            help="backend to benchmark (can be repeated); all by default")
+    run_parser.add_argument("--repeat", type=int, default=3, help="number of passes over the corpus")
+    run_parser.add_argument("--baseline", help="report to compare with")
+    run_parser.add_argument("--save-baseline", help="where to save the report")
+    run_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="allowed relative regression (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.delay, args.overwrite)
+        return 0
+    if args.command == "synthesize":
+        synthesize(args.overwrite)
+        return 0
+    return run(args.backend or list(get_args(ParserBackend)),
+               args.repeat,
+               args.baseline,
+               args.save_baseline,
+               args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Synthetic pages with the markup of dictionary pages.
+
+They cover everything the parser extracts (headers with IPA and audio, phrases, phrasal verbs,
+idioms, labels, translations, images, irregular forms, nested sections), so they are used as
+fixtures where recorded pages can't be shipped. Pages are deterministic: the same arguments
+always give the same page.
+"""
+
+
+def _pronunciation(region: str, ipa: str, audio_link: str) -> str:
+    return (f'<span class="{region} dpron-i "><span class="region dreg">{region}</span>'
+            f'<span class="daud"><audio class="hdn"><source type="audio/mpeg" src="{audio_link}"/></audio></span>'
+            f'<span class="pron dpron">/<span class="ipa dipa">{ipa}</span>/</span></span>')
+
+
+def _def_block(definition: str,
+               level: str = "",
+               gram: str = "",
+               region: str = "",
+               usage: str = "",
+               domain: str = "",
+               translation: str = "",
+               examples: tuple[tuple[str, str], ...] = (),
+               image_link: str = "",
+               alt_term: str = "",
+               irregular_form: str = "") -> str:
+    info = '<span class="def-info ddef-info">'
+    if level:
+        info += f'<span class="epp-xref dxref {level}">{level}</span>'
+    if gram:
+        info += f'<span class="gram dgram">{gram}</span>'
+    if region:
+        info += f'<span class="lab dlab"><span class="region dregion">{region}</span></span>'
+    if usage:
+        info += f'<span class="lab dlab"><span class="usage dusage">{usage}</span></span>'
+    if domain:
+        info += f'<span class="lab dlab"><span class="domain ddomain">{domain}</span></span>'
+    if alt_term:
+        info += f'<span class="var dvar">{alt_term}</span>'
+    if irregular_form:
+        info += ('<span class="irreg-infls dinfls"><span class="inf-group dinfg"><span class="lab dlab">plural</span> '
+                 f'<b class="inf dinf">{irregular_form}</b><span class="pron dpron">x</span></span></span>')
+    info += '</span>'
+
+    body = '<div class="def-body ddef_b">'
+    if translation:
+        body += f'<span class="trans dtrans dtrans-se" lang="ru">{translation}</span>'
+    for example, example_translation in examples:
+        body += f'<div class="examp dexamp"><span class="eg deg">{example}</span>'
+        if example_translation:
+            body += f'<span class="trans dtrans hdb">{example_translation}</span>'
+        body += '</div>'
+    body += '</div>'
+
+    image = f'<div class="dimg"><amp-img src="{image_link}" alt="x"></amp-img></div>' if image_link else ''
+    return (f'<div class="def-block ddef_block " data-wl-senseid="x">{image}<div class="ddef_h">{info}'
+            f'<div class="def ddef_d db">{definition}: </div></div>{body}</div>')
+
+
+def _header(word: str,
+            parts_of_speech: list[str],
+            h2_title: bool = False,
+            uk: bool = True,
+            us: bool = True,
+            alt_term: str = "",
+            irregular_form: str = "",
+            gram: str = "",
+            level: str = "") -> str:
+    header = '<div class="pos-header dpos-h">'
+    if h2_title:
+        header += f'<div class="di-title"><h2 class="headword">{word}</h2></div>'
+    else:
+        header += f'<div class="di-title"><span class="headword hdb dhw"><span class="hw dhw">{word}</span></span></div>'
+    header += '<div class="posgram dpos-g">'
+    header += "".join(f'<span class="pos dpos">{pos}</span>' for pos in parts_of_speech)
+    if gram:
+        header += f'<span class="gram dgram">{gram}</span>'
+    header += '</div>'
+    if level:
+        header += f'<span class="epp-xref dxref">{level}</span>'
+    if uk:
+        header += _pronunciation("uk", f"{word}uk", f"/media/english/uk_pron/{word}.mp3")
+    if us:
+        header += _pronunciation("us", f"{word}us", f"/media/english/us_pron/{word}.mp3")
+    if alt_term:
+        header += f'<span class="var dvar">{alt_term}</span><span class="spellvar dspellvar">{alt_term}s</span>'
+    if irregular_form:
+        header += ('<span class="irreg-infls dinfls">'
+                   f'<span class="inf-group dinfg"><b class="inf dinf">{irregular_form}</b></span>'
+                   f'<span class="inf-group dinfg"><b class="inf dinf">{irregular_form}2</b>'
+                   '<span class="pron dpron">p</span></span></span>')
+    return header + '</div>'
+
+
+def _entry(word: str, parts_of_speech: list[str], blocks: list[str], **header_kwargs) -> str:
+    return (f'<div class="pr entry-body__el">{_header(word, parts_of_speech, **header_kwargs)}'
+            f'<div class="pos-body"><div class="pr dsense "><div class="sense-body dsense_b">{"".join(blocks)}'
+            '</div></div></div></div>')
+
+
+def _phrase(title: str, blocks: list[str], with_info: bool = True) -> str:
+    info = ''
+    if with_info:
+        info = ('<span class="phrase-info dphrase-info"><span class="gram dgram">[ T ]</span>'
+                '<span class="var dvar">alt phr</span>'
+                '<span class="lab dlab"><span class="usage dusage">informal</span></span></span>')
+    return (f'<div class="pr phrase-block dphrase-block "><div class="phrase-head dphrase_h">'
+            f'<span class="phrase-title dphrase-title"><b>{title}</b></span>{info}</div>'
+            f'<div class="phrase-body dphrase_b">{"".join(blocks)}</div></div>')
+
+
+def _page(sections: list[str]) -> str:
+    return ('<!DOCTYPE html><html><head><title>dictionary</title></head><body><div class="page">'
+            + "".join(f'<div class="di-body"><div class="entry"><div class="entry-body">{section}</div></div></div>'
+                      for section in sections)
+            + '</div></body></html>')
+
+
+def make_page(word: str, entries: int, translated: bool = False) -> str:
+    """
+    Page of word with the given number of word entries (each has 8 senses) in the main section
+    plus phrasal verb, idiom and two short sections. translated adds translations of
+    definitions and examples, like pages of bilingual dictionaries have.
+    """
+    main_entries = []
+    for entry_index in range(entries):
+        with_translation = translated or entry_index % 2 == 1
+        blocks = [_def_block(f"{word} meaning {entry_index}.{i} with  spaces\n and lines",
+                             level=["A1", "B2", ""][i % 3],
+                             gram="[ C ]" if i % 2 else "",
+                             region="UK" if i % 4 == 0 else "",
+                             usage="formal" if i % 5 == 1 else "",
+                             domain="law" if i % 7 == 2 else "",
+                             translation=f"перевод {i}" if with_translation else "",
+                             examples=tuple((f"ex {i}.{j} &amp; more", f"пример {j}" if with_translation else "")
+                                            for j in range(i % 4)),
+                             image_link=f"/images/thumb/{word}{i}.jpg" if i % 6 == 3 else "",
+                             alt_term="(also x)" if i % 5 == 4 else "",
+                             irregular_form="xs" if i % 8 == 5 else "")
+                  for i in range(6)]
+        blocks.append(_phrase(f"{word} phrase {entry_index}",
+                              [_def_block("phrase def", level="C1", examples=(("phr ex", ""),))]))
+        blocks.append(_phrase(f"{word} bare {entry_index}", [_def_block("bare phrase def")], with_info=False))
+        parts_of_speech = ["verb" if entry_index % 2 else "noun"]
+        if entry_index == 3:
+            parts_of_speech += ["phrasal verb", "verb"]
+        main_entries.append(_entry(word, parts_of_speech, blocks,
+                                   h2_title=entry_index % 3 == 1,
+                                   uk=entry_index != 2,
+                                   alt_term="colour" if entry_index == 1 else "",
+                                   irregular_form="ran" if entry_index % 2 else "",
+                                   gram="[ I ]" if entry_index == 4 else "",
+                                   level="A2" if entry_index == 0 else ""))
+    main_entries.append(f'<div class="pv-block">{_header(f"{word} up", ["phrasal verb", "verb"])}'
+                        f'{_def_block("pv def", examples=(("pv ex", ""),))}</div>')
+    main_entries.append(f'<div class="pr idiom-block"><div class="idiom-block">'
+                        f'{_header(f"{word} idiom", ["idiom"], uk=False, us=False)}'
+                        f'{_def_block("idiom def", usage="informal")}</div></div>')
+
+    american_section = _entry(word, ["noun"], [_def_block("american def", examples=(("am ex", ""),))], uk=False)
+    nested_section = ('<div class="pr dictionary"><div class="link"><div class="pr di superentry"><div class="di-body">'
+                      f'<div class="entry-body">{_entry(word, ["adj"], [_def_block("nested")])}</div>'
+                      '</div></div></div></div>')
+    return _page(["".join(main_entries), american_section, nested_section])
+
+
+def make_phrasal_verb_page(word: str, pv_blocks: int, translated: bool = False) -> str:
+    """
+    Page of a phrasal verb ("look-up"): only pv-blocks with a few senses each, no word entries
+    """
+    title = word.replace("-", " ")
+    blocks = []
+    for block_index in range(pv_blocks):
+        def_blocks = [_def_block(f"{title} meaning {block_index}.{i}",
+                                 level=["B1", "C2", ""][i % 3],
+                                 gram="[ T ]" if i % 2 else "[ I ]",
+                                 usage="informal" if i == 2 else "",
+                                 translation=f"перевод {i}" if translated else "",
+                                 examples=tuple((f"{title} ex {i}.{j}", f"пример {j}" if translated else "")
+                                                for j in range(1 + i % 3)))
+                      for i in range(1 + block_index % 4)]
+        blocks.append(f'<div class="pv-block">{_header(title, ["phrasal verb", "verb"], uk=block_index == 0)}'
+                      f'{"".join(def_blocks)}</div>')
+    return _page(["".join(blocks)])
+
+
+def make_idiom_page(word: str, translated: bool = False) -> str:
+    """
+    Page of an idiom ("break-the-ice"): a single idiom-block with two senses
+    """
+    title = word.replace("-", " ")
+    def_blocks = [_def_block(f"{title} meaning {i}",
+                             usage="informal" if i == 0 else "",
+                             region="UK" if i == 1 else "",
+                             translation=f"перевод {i}" if translated else "",
+                             examples=((f"{title} ex {i}", "пример" if translated else ""),))
+                  for i in range(2)]
+    return _page([f'<div class="pr idiom-block"><div class="idiom-block">'
+                  f'{_header(title, ["idiom"], uk=False, us=False)}{"".join(def_blocks)}</div></div>'])
+
+
+def make_empty_page() -> str:
+    """
+    Page without dictionary sections, like the site returns for unknown words
+    """
+    return '<!DOCTYPE html><html><head><title>dictionary</title></head><body><div class="page"></div></body></html>'
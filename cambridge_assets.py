@@ -0,0 +1,266 @@
+"""
+Prefetching of audio and image assets referenced by parsing results.
+
+Links are deduplicated across a batch (header-level audio links are repeated in every
+sense of a POS block), downloaded concurrently over a shared session and stored once
+per content in a content-addressed directory:
+
+    from cambridge_assets import AssetStore, collect_asset_links, prefetch_assets, with_local_paths
+
+    with AssetStore("assets/") as store:
+        for link, path, error in prefetch_assets(collect_asset_links(results), store):
+            ...
+        localized = [with_local_paths(result, store) for result in results]
+"""
+import hashlib
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Iterable, Iterator, Optional
+
+import requests
+
+from cambridge_parser import DEFAULT_REQUESTS_HEADERS, RESULT_FORMAT, make_session, map_concurrently
+
+
+# link field of POSFields -> field with local paths added by with_local_paths()
+ASSET_FIELDS = {"UK_audio_links": "UK_audio_paths",
+                "US_audio_links": "US_audio_paths",
+                "image_links":    "image_paths"}
+
+PREFETCH_RESULT_T = tuple[str, Optional[str], Optional[Exception]]
+
+
+def _iter_links(result: list[RESULT_FORMAT]) -> Iterator[str]:
+    for word_info in result:
+        for pos_blocks in word_info.values():
+            for pos_block in pos_blocks:
+                data = pos_block["data"]
+                for links in data["UK_audio_links"]:
+                    yield from links
+                for links in data["US_audio_links"]:
+                    yield from links
+                for link in data["image_links"]:
+                    if link:  # senses without image have empty link
+                        yield link
+
+
+def _strong_validator(response: requests.Response) -> Optional[str]:
+    """
+    Validator to send in If-Range: a strong ETag or Last-Modified (weak ETags can't be used there)
+    """
+    etag = response.headers.get("ETag")
+    if etag is not None and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _content_range_start(response: requests.Response) -> Optional[int]:
+    # "bytes 100-199/200" -> 100
+    unit, _, byte_range = response.headers.get("Content-Range", "").partition(" ")
+    start = byte_range.partition("-")[0]
+    return int(start) if unit == "bytes" and start.isdigit() else None
+
+
+def collect_asset_links(results: Iterable[list[RESULT_FORMAT]]) -> list[str]:
+    """
+    Returns unique audio and image links of define()/parse_page() results in order of appearance
+    """
+    links: dict[str, None] = {}
+    for result in results:
+        links.update(dict.fromkeys(_iter_links(result)))
+    return list(links)
+
+
+class AssetStore:
+    """
+    Content-addressed storage of downloaded assets. Files are named by SHA-256 of their
+    content (objects/<2 hex digits>/<digest><extension of the link>), so equal files behind
+    different links are stored once. An SQLite index maps links to files.
+
+    Interrupted downloads are kept in partial/ along with the validator of the remote file
+    (ETag or Last-Modified) and continued with a Range request next time. If-Range makes
+    the server send the whole file if it changed in between; partial files without
+    a validator are downloaded again from the start.
+    The store can be shared between threads.
+    """
+    def __init__(self, root: str):
+        self.root = pathlib.Path(root)
+        self.objects_dir = self.root / "objects"
+        self.partial_dir = self.root / "partial"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.root / "index.db", check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS assets (
+                link       TEXT PRIMARY KEY,
+                digest     TEXT NOT NULL,
+                path       TEXT NOT NULL,
+                size       INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            ) WITHOUT ROWID""")
+
+    def path_for(self, link: str) -> Optional[str]:
+        """
+        Absolute path of the downloaded asset or None
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT path FROM assets WHERE link = ?", (link,)).fetchone()
+        return str(self.root / row[0]) if row is not None else None
+
+    def paths_for(self, links: Iterable[str]) -> dict[str, str]:
+        """
+        Same as path_for() for many links. Links that are not downloaded are omitted.
+        """
+        paths = {}
+        with self._lock:
+            for link in set(links):
+                row = self._connection.execute("SELECT path FROM assets WHERE link = ?", (link,)).fetchone()
+                if row is not None:
+                    paths[link] = str(self.root / row[0])
+        return paths
+
+    def _partial_path(self, link: str) -> pathlib.Path:
+        return self.partial_dir / hashlib.sha1(link.encode("utf-8")).hexdigest()
+
+    def download(self,
+                 link: str,
+                 session: requests.Session,
+                 request_headers: Optional[dict] = None,
+                 timeout: float = 10.0,
+                 chunk_size: int = 64 * 1024) -> str:
+        """
+        Downloads link (continuing a partial download if there is one) and returns path of the stored file
+        """
+        if request_headers is None:
+            request_headers = DEFAULT_REQUESTS_HEADERS
+
+        partial_path = self._partial_path(link)
+        validator_path = partial_path.with_suffix(".validator")
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        validator = validator_path.read_text(encoding="utf-8") if offset and validator_path.exists() else None
+        if validator is not None:
+            range_headers = {**request_headers, "Range": f"bytes={offset}-", "If-Range": validator}
+        else:
+            offset = 0
+            range_headers = request_headers
+
+        with session.get(link, headers=range_headers, timeout=timeout, stream=True) as response:
+            # 416 means that the partial file is already complete
+            if not (offset and response.status_code == 416):
+                response.raise_for_status()
+                if offset and response.status_code == 206 and _content_range_start(response) != offset:
+                    # a range that doesn't continue the partial file: start over
+                    partial_path.unlink()
+                    validator_path.unlink(missing_ok=True)
+                    return self.download(link, session, request_headers, timeout, chunk_size)
+                # the server sends the whole file if it changed or if it ignores Range
+                resumed = offset and response.status_code == 206
+                if not resumed:
+                    new_validator = _strong_validator(response)
+                    if new_validator is not None:
+                        validator_path.write_text(new_validator, encoding="utf-8")
+                    else:
+                        validator_path.unlink(missing_ok=True)
+                with open(partial_path, "ab" if resumed else "wb") as partial_file:
+                    for chunk in response.iter_content(chunk_size):
+                        partial_file.write(chunk)
+
+        digest = hashlib.sha256()
+        with open(partial_path, "rb") as partial_file:
+            for chunk in iter(lambda: partial_file.read(chunk_size), b""):
+                digest.update(chunk)
+        hex_digest = digest.hexdigest()
+        extension = pathlib.PurePosixPath(urllib.parse.urlsplit(link).path).suffix
+        relative_path = pathlib.Path("objects", hex_digest[:2], hex_digest + extension)
+        object_path = self.root / relative_path
+        object_path.parent.mkdir(exist_ok=True)
+        size = partial_path.stat().st_size
+        os.replace(partial_path, object_path)
+        validator_path.unlink(missing_ok=True)
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO assets (link, digest, path, size, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (link, hex_digest, relative_path.as_posix(), size, time.time()))
+        return str(object_path)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            links, files = self._connection.execute("SELECT COUNT(*), COUNT(DISTINCT path) FROM assets").fetchone()
+            size = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT path, size FROM assets)").fetchone()[0]
+        return {"links": links, "files": files, "size": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "AssetStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def prefetch_assets(links: Iterable[str],
+                    store: AssetStore,
+                    max_workers: int = 8,
+                    session: Optional[requests.Session] = None,
+                    request_headers: Optional[dict] = None,
+                    timeout: float = 10.0) -> Iterator[PREFETCH_RESULT_T]:
+    """
+    Downloads links that are not in the store yet. Yields (link, path, error) in completion
+    order for every unique link; already stored links are yielded first without requests.
+    If a download fails, path is None and error holds the raised exception.
+
+    session: requests.Session
+    |   Session to share between workers. If None, one is created with make_session()
+    |   and closed when the generator finishes.
+    """
+    unique_links = list(dict.fromkeys(links))
+    stored = store.paths_for(unique_links)
+    for link in unique_links:
+        if link in stored:
+            yield link, stored[link], None
+
+    own_session = session is None
+    if session is None:
+        session = make_session(pool_size=max_workers)
+
+    def download(link: str) -> str:
+        return store.download(link, session, request_headers, timeout)
+
+    try:
+        yield from map_concurrently(download, (link for link in unique_links if link not in stored), max_workers)
+    finally:
+        if own_session:
+            session.close()
+
+
+def with_local_paths(result: list[RESULT_FORMAT], store: AssetStore) -> list[RESULT_FORMAT]:
+    """
+    Returns copy of result where data of every POS block also has UK_audio_paths,
+    US_audio_paths and image_paths (see ASSET_FIELDS) that mirror the corresponding
+    link fields. Links that are not downloaded (or empty) get None.
+    """
+    paths = store.paths_for(_iter_links(result))
+    localized: list[RESULT_FORMAT] = []
+    for word_info in result:
+        localized_word_info: RESULT_FORMAT = {}
+        for word, pos_blocks in word_info.items():
+            localized_word_info[word] = []
+            for pos_block in pos_blocks:
+                data = dict(pos_block["data"])
+                data["UK_audio_paths"] = [[paths.get(link) for link in links] for links in data["UK_audio_links"]]
+                data["US_audio_paths"] = [[paths.get(link) for link in links] for links in data["US_audio_links"]]
+                data["image_paths"] = [paths.get(link) for link in data["image_links"]]
+                localized_word_info[word].append({"POS": pos_block["POS"], "data": data})  # type: ignore
+        localized.append(localized_word_info)
+    return localized
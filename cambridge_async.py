@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import time
+import aiohttp
+from concurrent.futures import Executor
+from typing import AsyncIterator, Iterable, Optional
+
+from cambridge_parser import (DEFAULT_REQUESTS_HEADERS, DEFINE_MANY_RESULT_T, LINK_PREFIX, RESULT_FORMAT,
+                              BilingualVariations, DictionaryType, ParserBackend, get_link, normalize_word,
+                              parse_page, retry_delay)
+from cambridge_metrics import get_observer
+
+
+# statuses that are worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Allows bursts of up to capacity requests
+    and rate requests per second on average.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate has to be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last_update: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._last_update is not None:
+                    self._tokens = min(self.capacity,
+                                       self._tokens + (now - self._last_update) * self.rate)
+                self._last_update = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def make_async_session(limit: int = 10) -> aiohttp.ClientSession:
+    """
+    Creates a session that keeps up to limit keep-alive connections.
+    Has to be called from a running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class LocalAsyncSession:
+    """
+    Session that sends requests to LINK_PREFIX to base_url instead, e.g. to a local
+    stand-in of the site (see cambridge_server). Can be passed as session to afetch_page(),
+    adefine() and adefine_many(). Has to be created from a running event loop.
+    """
+    def __init__(self, base_url: str, limit: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self._session = make_async_session(limit=limit)
+
+    def get(self, url: str, **kwargs):
+        if url.startswith(LINK_PREFIX):
+            url = self.base_url + url[len(LINK_PREFIX):]
+        return self._session.get(url, **kwargs)
+
+    async def close(self) -> None:
+        await self._session.close()
+
+    async def __aenter__(self) -> "LocalAsyncSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+async def afetch_page(word: str,
+                      dictionary_type: DictionaryType = "english",
+                      bilingual_vairation: BilingualVariations = "",
+                      request_headers: Optional[dict]=None,
+                      timeout: float=5.0,
+                      *,
+                      session: aiohttp.ClientSession,
+                      rate_limiter: Optional[TokenBucket]=None,
+                      max_retries: int=3,
+                      backoff: float=0.5) -> bytes:
+    """
+    Async version of fetch_page().
+
+    Requests that fail with a connection error, timeout or one of RETRY_STATUSES are
+    retried up to max_retries times with exponential backoff (Retry-After header is respected).
+    Every attempt takes a token from rate_limiter if it is given.
+    Error responses (404, 403, ... or retried ones) raise aiohttp.ClientResponseError,
+    so adefine_many() reports them as errors of the words like define_many() does.
+    """
+    if request_headers is None:
+        request_headers = DEFAULT_REQUESTS_HEADERS
+
+    observer = get_observer()
+    link = get_link(normalize_word(word), dictionary_type, bilingual_vairation)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        if observer is not None:
+            started_at = time.perf_counter()
+            if attempt:
+                observer.on_count("retries")
+        try:
+            async with session.get(link, headers=request_headers, timeout=client_timeout) as response:
+                if observer is not None:
+                    headers_received_at = time.perf_counter()
+                    observer.on_timing("request", headers_received_at - started_at)
+                    observer.on_count("requests")
+                if response.status not in RETRY_STATUSES or attempt >= max_retries:
+                    # error pages mustn't be parsed as words without definitions
+                    response.raise_for_status()
+                    content = await response.read()
+                    if observer is not None:
+                        observer.on_timing("download", time.perf_counter() - headers_received_at)
+                        observer.on_count("bytes_downloaded", len(content))
+                    return content
+                retry_after = response.headers.get("Retry-After")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= max_retries:
+                raise
+            retry_after = None
+        await asyncio.sleep(retry_delay(attempt, backoff, retry_after))
+        attempt += 1
+
+
+async def adefine(word: str,
+                  dictionary_type: DictionaryType = "english",
+                  bilingual_vairation: BilingualVariations = "",
+                  request_headers: Optional[dict]=None,
+                  timeout: float=5.0,
+                  *,
+                  session: Optional[aiohttp.ClientSession]=None,
+                  rate_limiter: Optional[TokenBucket]=None,
+                  max_retries: int=3,
+                  executor: Optional[Executor]=None,
+                  parser_backend: ParserBackend="html.parser") -> list[RESULT_FORMAT]:
+    """
+    Async version of define(). Arguments and return value are the same as in define().
+
+    session: aiohttp.ClientSession
+    |   Session to reuse connections with (see make_async_session()).
+    |   If None, a one-off session is used.
+
+    rate_limiter: TokenBucket
+    |   Optional limiter shared between concurrent lookups
+
+    executor: concurrent.futures.Executor
+    |   Executor to parse the page in so that parsing doesn't block the event loop.
+    |   If None, default executor of the loop is used.
+
+    parser_backend: Literal
+    |   HTML parser to use (see cambridge_parser.ParserBackend)
+    """
+    if session is None:
+        async with make_async_session(limit=1) as own_session:
+            return await adefine(word, dictionary_type, bilingual_vairation, request_headers, timeout,
+                                 session=own_session, rate_limiter=rate_limiter,
+                                 max_retries=max_retries, executor=executor,
+                                 parser_backend=parser_backend)
+
+    page = await afetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout,
+                             session=session, rate_limiter=rate_limiter, max_retries=max_retries)
+    loop = asyncio.get_running_loop()
+    # executor threads don't inherit context by themselves (see cambridge_metrics.observe())
+    return await loop.run_in_executor(executor, contextvars.copy_context().run, parse_page, page, parser_backend)
+
+
+async def adefine_many(words: Iterable[str],
+                       dictionary_type: DictionaryType = "english",
+                       bilingual_vairation: BilingualVariations = "",
+                       request_headers: Optional[dict]=None,
+                       timeout: float=5.0,
+                       *,
+                       max_concurrency: int=8,
+                       rate: Optional[float]=None,
+                       session: Optional[aiohttp.ClientSession]=None,
+                       max_retries: int=3,
+                       executor: Optional[Executor]=None,
+                       parser_backend: ParserBackend="html.parser") -> AsyncIterator[DEFINE_MANY_RESULT_T]:
+    """
+    Async version of define_many(). Yields (word, result, error) tuples in completion order.
+
+    max_concurrency: int
+    |   Maximum number of simultaneous requests. Parsing is not counted
+    |   towards this limit.
+
+    rate: float
+    |   If set, no more than rate requests per second are sent (on average)
+    """
+    own_session = session is None
+    if session is None:
+        session = make_async_session(limit=max_concurrency)
+    rate_limiter = TokenBucket(rate) if rate is not None else None
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def lookup(word: str) -> list[RESULT_FORMAT]:
+        async with semaphore:
+            page = await afetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout,
+                                     session=session, rate_limiter=rate_limiter, max_retries=max_retries)
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, parse_page, page, parser_backend)
+
+    def collect(task: asyncio.Task, word: str) -> DEFINE_MANY_RESULT_T:
+        error = task.exception()
+        if error is not None:
+            return word, None, error
+        return word, task.result(), None
+
+    in_flight: dict[asyncio.Task, str] = {}
+    try:
+        for word in words:
+            in_flight[asyncio.ensure_future(lookup(word))] = word
+            if len(in_flight) < 2 * max_concurrency:
+                continue
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield collect(task, in_flight.pop(task))
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield collect(task, in_flight.pop(task))
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        if own_session:
+            await session.close()
@@ -0,0 +1,238 @@
+"""
+Multi-core parsing of already downloaded pages.
+
+Parsing is CPU-bound, so pages are parsed by a pool of processes. Pages are sent to workers
+in chunks and results come back as one compact marshal blob per chunk:
+
+    from cambridge_batch import iter_directory, parse_many
+
+    for word, result, error in parse_many(iter_directory("pages/"), max_workers=16):
+        ...
+
+Also usable from the command line (writes one JSON object per line):
+
+    python cambridge_batch.py pages.tar.gz parsed.jsonl --workers 16
+"""
+import argparse
+import gzip
+import json
+import marshal
+import os
+import pathlib
+import sys
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, get_args
+
+from cambridge_cache import DiskCache
+from cambridge_parser import DEFINE_MANY_RESULT_T, RESULT_FORMAT, WORD_T, ParserBackend, parse_page
+
+
+PAGE_T = tuple[WORD_T, bytes | str]
+
+PAGE_SUFFIXES = (".html.gz", ".htm.gz", ".html", ".htm")
+
+
+def _page_name(name: str) -> Optional[str]:
+    """
+    "run.html.gz" -> "run"; None if name is not a page
+    """
+    for suffix in PAGE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
+def _read_page(name: str, content: bytes) -> bytes:
+    return gzip.decompress(content) if name.endswith(".gz") else content
+
+
+def iter_directory(path: str) -> Iterator[PAGE_T]:
+    """
+    Yields (word, html) for every *.html / *.htm file (optionally gzipped) under path.
+    word is the path of the file relative to the directory without the extension,
+    e.g. "run" for "run.html" and "english/run" for "english/run.html.gz".
+    """
+    root = pathlib.Path(path)
+    for file_path in sorted(root.rglob("*")):
+        word = _page_name(file_path.name)
+        if word is None or not file_path.is_file():
+            continue
+        relative_parent = file_path.parent.relative_to(root).as_posix()
+        if relative_parent != ".":
+            word = f"{relative_parent}/{word}"
+        yield word, _read_page(file_path.name, file_path.read_bytes())
+
+
+def iter_archive(path: str) -> Iterator[PAGE_T]:
+    """
+    Same as iter_directory() for tar (optionally compressed) and zip archives.
+    Members are read one at a time.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                word = _page_name(member.filename)
+                if word is not None and not member.is_dir():
+                    yield word, _read_page(member.filename, archive.read(member))
+        return
+
+    with tarfile.open(path, "r:*") as archive:
+        for member in archive:
+            word = _page_name(member.name)
+            if word is None or not member.isfile():
+                continue
+            page_file = archive.extractfile(member)
+            if page_file is not None:
+                yield word.removeprefix("./"), _read_page(member.name, page_file.read())
+
+
+def iter_disk_cache(cache: DiskCache) -> Iterator[PAGE_T]:
+    """
+    Yields (word, html) for every page stored in the cache. word is qualified with its
+    dictionary like relative paths of iter_directory(), e.g. "english/run" and "russian/run".
+    """
+    for (dictionary_type, bilingual_variation, word), content in cache.iter_pages():
+        yield f"{bilingual_variation or dictionary_type}/{word}", content
+
+
+def _parse_chunk(chunk: list[PAGE_T], parser_backend: ParserBackend) -> tuple[bytes, list[tuple[int, Exception]]]:
+    """
+    Runs in a worker process. Returns marshaled [(word, result or None)] together with
+    errors as (index in chunk, exception) pairs.
+    """
+    results: list[tuple[WORD_T, Optional[list[RESULT_FORMAT]]]] = []
+    errors: list[tuple[int, Exception]] = []
+    for index, (word, html) in enumerate(chunk):
+        try:
+            results.append((word, parse_page(html, parser_backend=parser_backend)))
+        except Exception as error:
+            results.append((word, None))
+            errors.append((index, error))
+    # parsing results consist only of builtin types, for which marshal is
+    # both faster and more compact than pickle
+    return marshal.dumps(results), errors
+
+
+def _unpack_chunk(future: Future) -> Iterator[DEFINE_MANY_RESULT_T]:
+    payload, errors = future.result()
+    chunk_errors = dict(errors)
+    for index, (word, result) in enumerate(marshal.loads(payload)):
+        yield word, result, chunk_errors.get(index)
+
+
+def _chunked(pages: Iterable[PAGE_T], chunk_size: int) -> Iterator[list[PAGE_T]]:
+    chunk: list[PAGE_T] = []
+    for page in pages:
+        chunk.append(page)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_many(pages: Iterable[PAGE_T],
+               parser_backend: ParserBackend = "html.parser",
+               max_workers: Optional[int] = None,
+               chunk_size: int = 8,
+               ordered: bool = True) -> Iterator[DEFINE_MANY_RESULT_T]:
+    """
+    Parses (word, html) pairs with parse_page() in a pool of processes.
+    Yields (word, result, error) tuples like define_many(): if a page fails to parse,
+    result is None and error holds the raised exception.
+
+    pages: Iterable
+    |   (word, html) pairs, e.g. from iter_directory(), iter_archive() or iter_disk_cache().
+    |   Consumed lazily: at most 2 * max_workers chunks are in flight at once.
+
+    max_workers: int
+    |   Number of worker processes. Defaults to the number of CPUs.
+
+    chunk_size: int
+    |   Number of pages sent to a worker at once. Larger chunks lower
+    |   inter-process overhead, smaller ones balance load better.
+
+    ordered: bool
+    |   Yield results in the order of pages. If False, chunks are yielded
+    |   as soon as they are parsed.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_in_flight = 2 * max_workers
+
+    # submission order is kept by dict
+    in_flight: dict[Future, None] = {}
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for chunk in _chunked(pages, chunk_size):
+            in_flight[executor.submit(_parse_chunk, chunk, parser_backend)] = None
+            while len(in_flight) >= max_in_flight:
+                yield from _drain(in_flight, ordered)
+
+        while in_flight:
+            yield from _drain(in_flight, ordered)
+    finally:
+        # generator may be closed early: drop chunks that haven't started yet
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _drain(in_flight: dict[Future, None], ordered: bool) -> Iterator[DEFINE_MANY_RESULT_T]:
+    """
+    Waits for at least one chunk and yields its results
+    """
+    if ordered:
+        oldest = next(iter(in_flight))
+        del in_flight[oldest]
+        yield from _unpack_chunk(oldest)
+        return
+
+    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+    for future in done:
+        del in_flight[future]
+        yield from _unpack_chunk(future)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parses downloaded dictionary pages on all cores")
+    parser.add_argument("source", help="directory with pages, tar/zip archive or page cache (see --cache)")
+    parser.add_argument("output", help="JSON Lines file to write {\"word\": ..., \"result\": ...} objects to")
+    parser.add_argument("--cache", action="store_true", help="source is a cambridge_cache.DiskCache file")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (all CPUs by default)")
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--unordered", action="store_true", help="write results in completion order")
+    parser.add_argument("--parser-backend", default="html.parser", choices=get_args(ParserBackend))
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache:
+        cache = DiskCache(args.source, ttl=None)
+        pages = iter_disk_cache(cache)
+    elif os.path.isdir(args.source):
+        pages = iter_directory(args.source)
+    else:
+        pages = iter_archive(args.source)
+
+    failed = 0
+    try:
+        with open(args.output, "w", encoding="utf-8") as output:
+            for word, result, error in parse_many(pages,
+                                                  parser_backend=args.parser_backend,
+                                                  max_workers=args.workers,
+                                                  chunk_size=args.chunk_size,
+                                                  ordered=not args.unordered):
+                if error is not None:
+                    failed += 1
+                    print(f"{word}: {error!r}", file=sys.stderr)
+                    continue
+                output.write(json.dumps({"word": word, "result": result}, ensure_ascii=False))
+                output.write("\n")
+    finally:
+        if cache is not None:
+            cache.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
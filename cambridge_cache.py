@@ -0,0 +1,441 @@
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Iterator, NamedTuple, Optional
+
+from cambridge_metrics import get_observer
+
+if TYPE_CHECKING:
+    from cambridge_parser import RESULT_FORMAT, BilingualVariations, DictionaryType, ParserBackend, Transport
+
+
+# (dictionary_type, bilingual_variation, word)
+CACHE_KEY_T = tuple[str, str, str]
+
+DEFAULT_TTL = 7 * 24 * 60 * 60  # a week
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60  # a day
+
+
+class CacheEntry(NamedTuple):
+    content:       bytes
+    etag:          Optional[str]
+    last_modified: Optional[str]
+    fetched_at:    float
+
+
+def make_cache_key(word: str, dictionary_type: str, bilingual_vairation: str) -> CACHE_KEY_T:
+    # dictionary_type is not considered by the site when bilingual_variation is set
+    if bilingual_vairation:
+        dictionary_type = ""
+    return dictionary_type, bilingual_vairation, word
+
+
+class DiskCache:
+    """
+    Persistent SQLite cache of raw dictionary pages. Pages are stored zlib-compressed,
+    so that parser fixes apply to cached pages too.
+
+    path: str
+    |   Path to the database file. Created if doesn't exist.
+
+    ttl: float
+    |   Number of seconds an entry is considered fresh. Stale entries are revalidated
+    |   with a conditional request (If-None-Match / If-Modified-Since) by fetch_page().
+    |   None means entries never go stale.
+
+    max_size: int
+    |   Maximum total size of compressed pages in bytes. When exceeded, least
+    |   recently used entries are evicted. None means unlimited.
+
+    negative_ttl: float
+    |   Number of seconds a word without any definitions (see put_missing()) is
+    |   considered missing and is not requested again. None means forever.
+
+    Redirects of words to their canonical headwords are remembered too (see resolve()).
+
+    The cache can be shared between threads (e.g. by define_many()).
+    """
+    def __init__(self,
+                 path: str,
+                 ttl: Optional[float] = DEFAULT_TTL,
+                 max_size: Optional[int] = None,
+                 compression_level: int = 6,
+                 negative_ttl: Optional[float] = DEFAULT_NEGATIVE_TTL):
+        import sqlite3
+
+        self.ttl = ttl
+        self.max_size = max_size
+        self.compression_level = compression_level
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                dictionary_type     TEXT NOT NULL,
+                bilingual_variation TEXT NOT NULL,
+                word                TEXT NOT NULL,
+                content             BLOB NOT NULL,
+                size                INTEGER NOT NULL,
+                etag                TEXT,
+                last_modified       TEXT,
+                fetched_at          REAL NOT NULL,
+                accessed_at         REAL NOT NULL,
+                PRIMARY KEY (dictionary_type, bilingual_variation, word)
+            )""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages(accessed_at)")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                dictionary_type     TEXT NOT NULL,
+                bilingual_variation TEXT NOT NULL,
+                word                TEXT NOT NULL,
+                headword            TEXT NOT NULL,
+                PRIMARY KEY (dictionary_type, bilingual_variation, word)
+            ) WITHOUT ROWID""")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS missing (
+                dictionary_type     TEXT NOT NULL,
+                bilingual_variation TEXT NOT NULL,
+                word                TEXT NOT NULL,
+                checked_at          REAL NOT NULL,
+                PRIMARY KEY (dictionary_type, bilingual_variation, word)
+            ) WITHOUT ROWID""")
+        self._total_size: int = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, key: CACHE_KEY_T) -> Optional[CacheEntry]:
+        """
+        Returns cached entry regardless of its freshness (see is_fresh()) or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, etag, last_modified, fetched_at FROM pages "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE pages SET accessed_at = ? "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", (time.time(), *key))
+            content, etag, last_modified, fetched_at = row
+            entry = CacheEntry(content, etag, last_modified, fetched_at)
+            if self.is_fresh(entry):
+                self.hits += 1
+            else:
+                self.stale += 1
+        return entry._replace(content=zlib.decompress(content))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl is None or time.time() - entry.fetched_at < self.ttl
+
+    def put(self,
+            key: CACHE_KEY_T,
+            content: bytes,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        compressed = zlib.compress(content, self.compression_level)
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM pages "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(dictionary_type, bilingual_variation, word, content, size, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, compressed, len(compressed), etag, last_modified, now, now))
+            self._total_size += len(compressed) - (previous[0] if previous is not None else 0)
+            self._connection.execute(
+                "DELETE FROM missing WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key)
+            self._evict()
+
+    def mark_revalidated(self, key: CACHE_KEY_T) -> None:
+        """
+        Marks entry as fresh again after server responded with 304 Not Modified.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", (now, now, *key))
+            self.revalidated += 1
+
+    def resolve(self, key: CACHE_KEY_T) -> CACHE_KEY_T:
+        """
+        Returns key of the canonical headword if the word is known to redirect to it (see put_alias())
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT headword FROM aliases "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key).fetchone()
+        if row is None:
+            return key
+        return key[0], key[1], row[0]
+
+    def put_alias(self, key: CACHE_KEY_T, headword: str) -> None:
+        """
+        Remembers that the site redirected the word of key to headword
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO aliases (dictionary_type, bilingual_variation, word, headword) "
+                "VALUES (?, ?, ?, ?)", (*key, headword))
+
+    def is_missing(self, key: CACHE_KEY_T) -> bool:
+        """
+        True if the word was recently found to have no definitions (see negative_ttl)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT checked_at FROM missing "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key).fetchone()
+            if row is None or (self.negative_ttl is not None and time.time() - row[0] >= self.negative_ttl):
+                return False
+            self.negative_hits += 1
+            return True
+
+    def put_missing(self, key: CACHE_KEY_T) -> None:
+        """
+        Records that the word has no definitions. Its page is dropped from the cache.
+        """
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM pages "
+                "WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key).fetchone()
+            if previous is not None:
+                self._connection.execute(
+                    "DELETE FROM pages WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", key)
+                self._total_size -= previous[0]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO missing (dictionary_type, bilingual_variation, word, checked_at) "
+                "VALUES (?, ?, ?, ?)", (*key, time.time()))
+
+    def iter_pages(self, batch_size: int = 100) -> Iterator[tuple[CACHE_KEY_T, bytes]]:
+        """
+        Yields (key, content) for every cached page regardless of its freshness.
+        Doesn't count as access (hit counters and LRU order are not updated).
+        """
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT rowid, dictionary_type, bilingual_variation, word, content FROM pages "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size)).fetchall()
+            if not rows:
+                return
+            for last_rowid, dictionary_type, bilingual_variation, word, content in rows:
+                yield (dictionary_type, bilingual_variation, word), zlib.decompress(content)
+
+    def _evict(self) -> None:
+        # has to be called with self._lock acquired
+        if self.max_size is None or self._total_size <= self.max_size:
+            return
+        rows = self._connection.execute(
+            "SELECT dictionary_type, bilingual_variation, word, size FROM pages ORDER BY accessed_at")
+        evicted: list[CACHE_KEY_T] = []
+        for dictionary_type, bilingual_variation, word, size in rows:
+            if self._total_size <= self.max_size:
+                break
+            evicted.append((dictionary_type, bilingual_variation, word))
+            self._total_size -= size
+        rows.close()
+        self._connection.executemany(
+            "DELETE FROM pages WHERE dictionary_type = ? AND bilingual_variation = ? AND word = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            aliases = self._connection.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+            missing = self._connection.execute("SELECT COUNT(*) FROM missing").fetchone()[0]
+        return {"hits":          self.hits,
+                "misses":        self.misses,
+                "stale":         self.stale,
+                "revalidated":   self.revalidated,
+                "evictions":     self.evictions,
+                "negative_hits": self.negative_hits,
+                "entries":       entries,
+                "aliases":       aliases,
+                "missing":       missing,
+                "size":          self._total_size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM pages")
+            self._connection.execute("DELETE FROM aliases")
+            self._connection.execute("DELETE FROM missing")
+            self._total_size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "DiskCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Approximate number of bytes taken by obj together with everything it references
+    (only containers that appear in parsing results are traversed).
+    Objects referenced several times are counted once.
+    """
+    seen: set[int] = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+
+class _Flight:
+    """
+    Computation of a value that other threads can wait for
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MemoryCache:
+    """
+    In-process LRU cache of parsing results, bounded by their estimated size in bytes
+    (see estimate_size()) rather than by number of entries.
+
+    Concurrent lookups of the same uncached key are coalesced: only the first caller
+    computes the value and the rest wait for it. Errors are propagated to all waiting
+    callers and are not cached.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._in_flight: dict[Any, _Flight] = {}
+        self._total_bytes = 0
+
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                flight = self._in_flight.get(key)
+                if flight is not None:
+                    self.coalesced += 1
+                    is_owner = False
+                else:
+                    self.misses += 1
+                    flight = self._in_flight[key] = _Flight()
+                    is_owner = True
+
+        observer = get_observer()
+        if entry is not None:
+            if observer is not None:
+                observer.on_count("memory_cache_hits")
+            return entry[0]
+        if observer is not None:
+            observer.on_count("memory_cache_misses" if is_owner else "memory_cache_coalesced")
+
+        if not is_owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.error is None:
+                    self._store(key, flight.result)
+            flight.done.set()
+        return flight.result
+
+    def _store(self, key: Any, value: Any) -> None:
+        # has to be called with self._lock acquired
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+            self.evictions += 1
+
+    def define(self,
+               word: str,
+               dictionary_type: "DictionaryType" = "english",
+               bilingual_vairation: "BilingualVariations" = "",
+               request_headers: Optional[dict] = None,
+               timeout: float = 5.0,
+               session: Optional["Transport"] = None,
+               cache: Optional[DiskCache] = None,
+               parser_backend: "ParserBackend" = "html.parser") -> list["RESULT_FORMAT"]:
+        """
+        Memoized cambridge_parser.define(). Arguments are the same as in define();
+        only the word and the dictionary are a part of the key.
+        Unlike define(), error responses (429, 5xx, ...) raise requests.HTTPError
+        instead of returning [], so that they are never cached.
+        """
+        from cambridge_parser import _checked_define, normalize_word, parse_page
+
+        normalized_word = normalize_word(word)
+        key = make_cache_key(normalized_word, dictionary_type, bilingual_vairation)
+        return self.get_or_compute(key, lambda: _checked_define(normalized_word,
+                                                                dictionary_type,
+                                                                bilingual_vairation,
+                                                                request_headers,
+                                                                timeout,
+                                                                session,
+                                                                cache,
+                                                                lambda page: parse_page(page, parser_backend=parser_backend)))
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits":      self.hits,
+                    "misses":    self.misses,
+                    "coalesced": self.coalesced,
+                    "evictions": self.evictions,
+                    "entries":   len(self._entries),
+                    "bytes":     self._total_bytes,
+                    "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
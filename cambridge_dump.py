@@ -0,0 +1,567 @@
+"""
+Offline dictionary dump.
+
+Crawls a list of headwords with define() into a single SQLite file which then serves
+lookups through LocalDictionary without network:
+
+    python cambridge_dump.py words.txt english.db --dictionary-type english --delay 1
+
+Crawling is checkpointed and can be resumed by running the same command again.
+Already crawled words are refreshed incrementally with --refresh, which writes added,
+removed and changed senses as JSON Lines:
+
+    python cambridge_dump.py words.txt english.db --refresh --diff-output changes.jsonl
+"""
+import argparse
+import hashlib
+import json
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple, Optional, TypedDict, get_args
+
+from cambridge_cache import DiskCache, MemoryCache, make_cache_key
+from cambridge_parser import (DEFAULT_REQUESTS_HEADERS, RESULT_FORMAT, BilingualVariations, DictionaryType,
+                               ParserBackend, SenseRecord, get_link, make_session, map_concurrently,
+                               normalize_word, parse_page_if_changed, result_to_sense_records, retry_delay)
+
+# requests is needed only for crawling: LocalDictionary lookups don't import it
+if TYPE_CHECKING:
+    import requests
+
+
+# version of the layout of the dump file
+DUMP_FORMAT_VERSION = "1"
+
+STATUS_PENDING = 0
+STATUS_DONE    = 1
+STATUS_FAILED  = 2
+
+
+def encode_result(result: list[RESULT_FORMAT]) -> bytes:
+    return zlib.compress(json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_result(data: bytes) -> list[RESULT_FORMAT]:
+    return json.loads(zlib.decompress(data))
+
+
+def sense_hash(record: SenseRecord) -> str:
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _sense_identity(record: SenseRecord) -> tuple:
+    """
+    Senses with the same identity are considered to be versions of one sense
+    """
+    return record["dictionary_index"], record["word"], tuple(record["POS"]), record["definition"]
+
+
+class EntryDiff(TypedDict):
+    word:    str
+    added:   list[SenseRecord]
+    removed: list[SenseRecord]
+    changed: list[tuple[SenseRecord, SenseRecord]]  # (old, new)
+
+
+def diff_senses(word: str, old_records: list[SenseRecord], new_records: list[SenseRecord]) -> EntryDiff:
+    """
+    Senses that are not present in both lists unchanged are paired up by their identity
+    (section, headword, POS and definition): paired ones are changed, the rest are added or removed.
+    Thus a sense with reworded definition is reported as removed and added.
+    """
+    unmatched_old: dict[str, list[SenseRecord]] = {}
+    for record in old_records:
+        unmatched_old.setdefault(sense_hash(record), []).append(record)
+    unmatched_new = []
+    for record in new_records:
+        same_records = unmatched_old.get(sense_hash(record))
+        if same_records:
+            same_records.pop()
+        else:
+            unmatched_new.append(record)
+
+    old_by_identity: dict[tuple, list[SenseRecord]] = {}
+    for records in unmatched_old.values():
+        for record in records:
+            old_by_identity.setdefault(_sense_identity(record), []).append(record)
+
+    diff: EntryDiff = {"word": word, "added": [], "removed": [], "changed": []}
+    for record in unmatched_new:
+        previous_versions = old_by_identity.get(_sense_identity(record))
+        if previous_versions:
+            diff["changed"].append((previous_versions.pop(0), record))
+        else:
+            diff["added"].append(record)
+    diff["removed"] = [record for records in old_by_identity.values() for record in records]
+    return diff
+
+
+class _PageCheck(NamedTuple):
+    """
+    Outcome of a (conditional) request of a page made by DumpBuilder
+    """
+    not_modified:  bool
+    etag:          Optional[str]
+    last_modified: Optional[str]
+    sections_hash: Optional[str]
+    result:        Optional[list[RESULT_FORMAT]]  # None if page wasn't modified
+
+
+class _PoliteSession:
+    """
+    Wrapper of make_session() that keeps at least delay seconds between starts
+    of consecutive requests (across all threads that use it).
+    Throttled requests (429) are retried up to max_retries times; all threads pause
+    for the time the server asks for in Retry-After. The last response is returned as is.
+    """
+    def __init__(self, delay: float, pool_size: int, max_retries: int = 3):
+        self.delay = delay
+        self.max_retries = max_retries
+        self._session = make_session(pool_size=pool_size)
+        self._lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def get(self, *args, **kwargs) -> "requests.Response":
+        attempt = 0
+        while True:
+            self._wait_turn()
+            response = self._session.get(*args, **kwargs)
+            if response.status_code != 429 or attempt >= self.max_retries:
+                return response
+            self._pause(retry_delay(attempt, max(self.delay, 1.0), response.headers.get("Retry-After")))
+            response.close()
+            attempt += 1
+
+    def _wait_turn(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.delay
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next_request_at = max(self._next_request_at, time.monotonic() + seconds)
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            word          TEXT PRIMARY KEY,
+            status        INTEGER NOT NULL,
+            data          BLOB,
+            error         TEXT,
+            updated_at    REAL,
+            -- validators of the page and hash of its dictionary sections (see DumpBuilder.refresh())
+            etag          TEXT,
+            last_modified TEXT,
+            sections_hash TEXT
+        ) WITHOUT ROWID""")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS senses (
+            word     TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            hash     TEXT NOT NULL,
+            PRIMARY KEY (word, position)
+        ) WITHOUT ROWID""")
+    # headwords found on the pages -> words they were looked up by
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS headwords (
+            headword TEXT NOT NULL,
+            word     TEXT NOT NULL,
+            PRIMARY KEY (headword, word)
+        ) WITHOUT ROWID""")
+    connection.commit()
+    return connection
+
+
+class DumpBuilder:
+    """
+    Crawls words into a dump file. All words of a dump are looked up
+    in the same dictionary, which is stored in the file.
+    """
+    def __init__(self,
+                 path: str,
+                 dictionary_type: DictionaryType = "english",
+                 bilingual_vairation: BilingualVariations = ""):
+        self.path = path
+        self.dictionary_type = dictionary_type
+        self.bilingual_vairation = bilingual_vairation
+        self._connection = _connect(path)
+
+        meta = {"format_version":      DUMP_FORMAT_VERSION,
+                "dictionary_type":     dictionary_type,
+                "bilingual_variation": bilingual_vairation}
+        stored_meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        if stored_meta and stored_meta != meta:
+            raise ValueError(f"{path} was built with different settings: {stored_meta}")
+        self._connection.executemany("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", meta.items())
+        self._connection.commit()
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """
+        Schedules words for crawling. Words are stored normalized (see normalize_word()),
+        already known words are ignored.
+        """
+        normalized_words = (normalize_word(word) for word in words)
+        self._connection.executemany("INSERT OR IGNORE INTO entries (word, status) VALUES (?, ?)",
+                                     ((word, STATUS_PENDING) for word in normalized_words if word))
+        self._connection.commit()
+
+    def pending_words(self, retry_failed: bool = True) -> list[str]:
+        statuses = (STATUS_PENDING, STATUS_FAILED) if retry_failed else (STATUS_PENDING,)
+        return [word for word, in self._connection.execute(
+            f"SELECT word FROM entries WHERE status IN ({', '.join('?' * len(statuses))}) ORDER BY word", statuses)]
+
+    def progress(self) -> dict[str, int]:
+        counts = dict(self._connection.execute("SELECT status, COUNT(*) FROM entries GROUP BY status"))
+        return {"pending": counts.get(STATUS_PENDING, 0),
+                "done":    counts.get(STATUS_DONE, 0),
+                "failed":  counts.get(STATUS_FAILED, 0)}
+
+    def crawl(self,
+              delay: float = 1.0,
+              max_workers: int = 1,
+              checkpoint_every: int = 100,
+              retry_failed: bool = True,
+              timeout: float = 5.0,
+              cache: Optional[DiskCache] = None,
+              parser_backend: ParserBackend = "html.parser") -> Iterator[tuple[str, Optional[Exception]]]:
+        """
+        Looks up pending words and stores results. Yields (word, error) for every processed word.
+        Words whose page couldn't be fetched (error responses included) are marked as failed
+        and retried by the next crawl unless retry_failed is False.
+        Validators of the pages and hashes of their dictionary sections are stored as well,
+        so that refresh() right after crawling neither downloads nor parses unchanged pages.
+
+        delay: float
+        |   Minimal interval between requests in seconds (shared by all workers)
+
+        checkpoint_every: int
+        |   Number of processed words after which progress is committed to the file.
+        |   Crawling interrupted between checkpoints loses only uncommitted words.
+
+        cache: cambridge_cache.DiskCache
+        |   Fresh pages of the cache are used instead of requests; downloaded pages are put into it.
+        """
+        session = _PoliteSession(delay, pool_size=max_workers)
+
+        def check(word: str) -> _PageCheck:
+            return self._check_page(session, word, None, None, None, timeout, parser_backend, cache)
+
+        uncommitted = 0
+        try:
+            for word, page_check, error in map_concurrently(check, self.pending_words(retry_failed), max_workers):
+                if error is None:
+                    self._store(word, page_check.result)
+                    self._store_validators(word, page_check)
+                else:
+                    self._connection.execute("UPDATE entries SET status = ?, error = ?, updated_at = ? WHERE word = ?",
+                                             (STATUS_FAILED, repr(error), time.time(), word))
+                uncommitted += 1
+                if uncommitted >= checkpoint_every:
+                    self._connection.commit()
+                    uncommitted = 0
+                yield word, error
+        finally:
+            self._connection.commit()
+            session.close()
+
+    def refresh(self,
+                words: Optional[Iterable[str]] = None,
+                delay: float = 1.0,
+                max_workers: int = 1,
+                checkpoint_every: int = 100,
+                timeout: float = 5.0,
+                parser_backend: ParserBackend = "html.parser") -> Iterator[tuple[str, Optional[EntryDiff], Optional[Exception]]]:
+        """
+        Re-downloads already crawled words and stores what changed.
+        Yields (word, diff, error) for every processed word; diff is None if no sense changed.
+
+        Cost depends on how much changed:
+            - pages are requested conditionally (If-None-Match / If-Modified-Since),
+              so unchanged pages are not downloaded if the server supports it;
+            - pages whose dictionary sections have the same hash as before are not parsed;
+            - stored data is rewritten only if senses differ.
+
+        words: Iterable
+        |   Words to refresh. All crawled words by default.
+        """
+        if words is None:
+            words = [word for word, in self._connection.execute(
+                "SELECT word FROM entries WHERE status = ? ORDER BY word", (STATUS_DONE,))]
+        else:
+            words = [normalize_word(word) for word in words]
+
+        session = _PoliteSession(delay, pool_size=max_workers)
+
+        def check(word: str, etag: Optional[str], last_modified: Optional[str], sections_hash: Optional[str]) -> _PageCheck:
+            return self._check_page(session, word, etag, last_modified, sections_hash, timeout, parser_backend)
+
+        def iter_crawled() -> Iterator[tuple[str, Optional[str], Optional[str], Optional[str]]]:
+            # runs in the thread of the generator, like every use of the connection
+            for word in words:
+                row = self._connection.execute(
+                    "SELECT etag, last_modified, sections_hash FROM entries WHERE word = ? AND status = ?",
+                    (word, STATUS_DONE)).fetchone()
+                if row is not None:
+                    yield (word, *row)
+
+        uncommitted = 0
+        try:
+            for (word, *_), page_check, error in map_concurrently(lambda entry: check(*entry),
+                                                                   iter_crawled(),
+                                                                   max_workers):
+                yield word, None if error is not None else self._apply_check(word, page_check), error
+                uncommitted += 1
+                if uncommitted >= checkpoint_every:
+                    self._connection.commit()
+                    uncommitted = 0
+        finally:
+            self._connection.commit()
+            session.close()
+
+    def _check_page(self,
+                    session: _PoliteSession,
+                    word: str,
+                    etag: Optional[str],
+                    last_modified: Optional[str],
+                    sections_hash: Optional[str],
+                    timeout: float,
+                    parser_backend: ParserBackend,
+                    cache: Optional[DiskCache] = None) -> _PageCheck:
+        """
+        Requests the page of word (conditionally if validators are given) and parses it
+        unless its dictionary sections hash to sections_hash. Error responses raise requests.HTTPError.
+        """
+        cache_key = make_cache_key(word, self.dictionary_type, self.bilingual_vairation)
+        if cache is not None:
+            cached_entry = cache.get(cache.resolve(cache_key))
+            if cached_entry is not None and cache.is_fresh(cached_entry):
+                new_sections_hash, result = parse_page_if_changed(cached_entry.content, sections_hash, parser_backend)
+                return _PageCheck(False, cached_entry.etag, cached_entry.last_modified, new_sections_hash, result)
+
+        request_headers = dict(DEFAULT_REQUESTS_HEADERS)
+        if etag is not None:
+            request_headers["If-None-Match"] = etag
+        if last_modified is not None:
+            request_headers["If-Modified-Since"] = last_modified
+        response = session.get(get_link(word, self.dictionary_type, self.bilingual_vairation),
+                               headers=request_headers,
+                               timeout=timeout)
+        if response.status_code == 304:
+            return _PageCheck(True, etag, last_modified, sections_hash, None)
+        response.raise_for_status()
+        if cache is not None:
+            cache.put(cache_key,
+                      response.content,
+                      etag=response.headers.get("ETag"),
+                      last_modified=response.headers.get("Last-Modified"))
+        new_sections_hash, result = parse_page_if_changed(response.content, sections_hash, parser_backend)
+        return _PageCheck(False,
+                          response.headers.get("ETag"),
+                          response.headers.get("Last-Modified"),
+                          new_sections_hash,
+                          result)
+
+    def _apply_check(self, word: str, page_check: _PageCheck) -> Optional[EntryDiff]:
+        if page_check.result is None:
+            self._store_validators(word, page_check)
+            return None
+
+        new_records = list(result_to_sense_records(page_check.result))
+        stored_hashes = [stored_hash for stored_hash, in self._connection.execute(
+            "SELECT hash FROM senses WHERE word = ? ORDER BY position", (word,))]
+        diff = None
+        # compared in order: reordered senses are stored too, though they are reported as no diff
+        if stored_hashes != [sense_hash(record) for record in new_records]:
+            data, = self._connection.execute("SELECT data FROM entries WHERE word = ?", (word,)).fetchone()
+            old_records = list(result_to_sense_records(decode_result(data)))
+            diff = diff_senses(word, old_records, new_records)
+            if not (diff["added"] or diff["removed"] or diff["changed"]):
+                diff = None
+            self._store(word, page_check.result)
+        self._store_validators(word, page_check)
+        return diff
+
+    def _store_validators(self, word: str, page_check: _PageCheck) -> None:
+        self._connection.execute("UPDATE entries SET etag = ?, last_modified = ?, sections_hash = ?, updated_at = ? "
+                                 "WHERE word = ?",
+                                 (page_check.etag, page_check.last_modified, page_check.sections_hash, time.time(), word))
+
+    def _store(self, word: str, result: list[RESULT_FORMAT]) -> None:
+        self._connection.execute("UPDATE entries SET status = ?, data = ?, error = NULL, updated_at = ? WHERE word = ?",
+                                 (STATUS_DONE, encode_result(result), time.time(), word))
+        self._connection.execute("DELETE FROM headwords WHERE word = ?", (word,))
+        headwords = {normalize_word(headword) for word_info in result for headword in word_info}
+        self._connection.executemany("INSERT OR IGNORE INTO headwords (headword, word) VALUES (?, ?)",
+                                     ((headword, word) for headword in headwords))
+        self._connection.execute("DELETE FROM senses WHERE word = ?", (word,))
+        self._connection.executemany("INSERT INTO senses (word, position, hash) VALUES (?, ?, ?)",
+                                     ((word, position, sense_hash(record))
+                                      for position, record in enumerate(result_to_sense_records(result))))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "DumpBuilder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class LocalDictionary:
+    """
+    Serves lookups from a dump built by DumpBuilder. Doesn't use network.
+
+    memory_cache: cambridge_cache.MemoryCache
+    |   Optional cache of decoded results for frequently looked up words.
+    |   Cached results are shared between callers and must not be mutated.
+    """
+    def __init__(self, path: str, memory_cache: Optional[MemoryCache] = None):
+        self.path = path
+        self.memory_cache = memory_cache
+        # read-only access; several processes can read the same dump
+        uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        self.dictionary_type: DictionaryType = meta["dictionary_type"]
+        self.bilingual_vairation: BilingualVariations = meta["bilingual_variation"]
+
+    def define(self, word: str) -> list[RESULT_FORMAT]:
+        """
+        Same result as cambridge_parser.define() at the time of crawling.
+        word is normalized like define() does ("Ran" finds "ran").
+        If word wasn't crawled, it is looked up among headwords found on crawled pages.
+        Returns empty list for unknown words.
+        """
+        word = normalize_word(word)
+        if self.memory_cache is not None:
+            return self.memory_cache.get_or_compute((self.path, word), lambda: self._load(word))
+        return self._load(word)
+
+    def _load(self, word: str) -> list[RESULT_FORMAT]:
+        row = self._connection.execute("SELECT data FROM entries WHERE word = ? AND status = ?",
+                                       (word, STATUS_DONE)).fetchone()
+        if row is None:
+            row = self._connection.execute(
+                "SELECT entries.data FROM headwords JOIN entries ON entries.word = headwords.word "
+                "WHERE headwords.headword = ? AND entries.status = ? LIMIT 1", (word, STATUS_DONE)).fetchone()
+        if row is None:
+            return []
+        return decode_result(row[0])
+
+    def __contains__(self, word: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM entries WHERE word = ? AND status = ?",
+                                        (normalize_word(word), STATUS_DONE)).fetchone() is not None
+
+    def words(self) -> Iterator[str]:
+        for word, in self._connection.execute("SELECT word FROM entries WHERE status = ? ORDER BY word", (STATUS_DONE,)):
+            yield word
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "LocalDictionary":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_wordlist(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as wordlist:
+        for line in wordlist:
+            word = line.strip()
+            if word and not word.startswith("#"):
+                yield word
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Crawls a list of words into a local dictionary dump")
+    parser.add_argument("wordlist", help="file with one word per line")
+    parser.add_argument("dump", help="path to the dump file (created if doesn't exist)")
+    parser.add_argument("--dictionary-type", default="english", choices=get_args(DictionaryType))
+    parser.add_argument("--bilingual-variation", default="", choices=get_args(BilingualVariations))
+    parser.add_argument("--delay", type=float, default=1.0, help="minimal interval between requests in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="number of simultaneous requests")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--no-retry-failed", action="store_true", help="don't retry words that failed before")
+    parser.add_argument("--cache", help="path to the page cache (see cambridge_cache.DiskCache)")
+    parser.add_argument("--parser-backend", default="html.parser", choices=get_args(ParserBackend))
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-download already crawled words of the wordlist and record what changed")
+    parser.add_argument("--diff-output", help="where to write changed senses of --refresh (JSON Lines)")
+    args = parser.parse_args(argv)
+
+    if args.refresh:
+        return _refresh(args)
+
+    cache = DiskCache(args.cache) if args.cache else None
+    with DumpBuilder(args.dump, args.dictionary_type, args.bilingual_variation) as builder:
+        builder.add_words(read_wordlist(args.wordlist))
+        progress = builder.progress()
+        total = progress["pending"] + (progress["failed"] if not args.no_retry_failed else 0)
+        try:
+            for processed, (word, error) in enumerate(builder.crawl(delay=args.delay,
+                                                                    max_workers=args.workers,
+                                                                    checkpoint_every=args.checkpoint_every,
+                                                                    retry_failed=not args.no_retry_failed,
+                                                                    timeout=args.timeout,
+                                                                    cache=cache,
+                                                                    parser_backend=args.parser_backend), 1):
+                if error is not None:
+                    print(f"[{processed}/{total}] {word}: {error!r}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("Interrupted. Run the same command to resume.", file=sys.stderr)
+            return 130
+        finally:
+            if cache is not None:
+                cache.close()
+        print(builder.progress())
+    return 0
+
+
+def _refresh(args: argparse.Namespace) -> int:
+    diff_output = open(args.diff_output, "w", encoding="utf-8") if args.diff_output else None
+    changed = 0
+    with DumpBuilder(args.dump, args.dictionary_type, args.bilingual_variation) as builder:
+        try:
+            for word, diff, error in builder.refresh(read_wordlist(args.wordlist),
+                                                     delay=args.delay,
+                                                     max_workers=args.workers,
+                                                     checkpoint_every=args.checkpoint_every,
+                                                     timeout=args.timeout,
+                                                     parser_backend=args.parser_backend):
+                if error is not None:
+                    print(f"{word}: {error!r}", file=sys.stderr)
+                elif diff is not None:
+                    changed += 1
+                    if diff_output is not None:
+                        diff_output.write(json.dumps(diff, ensure_ascii=False))
+                        diff_output.write("\n")
+        except KeyboardInterrupt:
+            print("Interrupted.", file=sys.stderr)
+            return 130
+        finally:
+            if diff_output is not None:
+                diff_output.close()
+    print(f"{changed} words changed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Exporters of parsing results with one sense (SenseRecord) per record.
+
+    from cambridge_export import open_writer
+    from cambridge_parser import define
+
+    with open_writer("senses.parquet") as writer:
+        for word in words:
+            writer.write_result(define(word))
+
+Formats (chosen by extension in open_writer()):
+    .jsonl    - JSON Lines
+    .msgpack  - stream of MessagePack maps (requires msgpack)
+    .parquet  - Parquet (requires pyarrow)
+    .arrow    - Arrow IPC file, readable with zero-copy memory mapping (requires pyarrow)
+
+All writers are streaming: records are written as they come (columnar formats buffer
+up to batch_size records), so dumps of any size can be exported.
+"""
+import abc
+import json
+from typing import IO, Any, Iterable, Iterator, Optional
+
+from cambridge_parser import RESULT_FORMAT, SenseRecord, result_to_sense_records
+
+
+# columns of the columnar formats in the order of SenseRecord
+STRING_FIELDS = ("word", "definition", "definition_translation", "image_link", "level")
+LIST_FIELDS = ("POS", "examples", "examples_translations", "labels_and_codes", "regions", "usages",
+               "domains", "alt_terms", "irregular_forms", "UK_IPA", "US_IPA", "UK_audio_links", "US_audio_links")
+FIELDS = tuple(SenseRecord.__annotations__)
+
+
+def arrow_schema():
+    """
+    Arrow schema of exported senses: list fields of SenseRecord become list<string> columns
+    """
+    import pyarrow
+
+    types = {"dictionary_index": pyarrow.int32()}
+    types.update({field: pyarrow.string() for field in STRING_FIELDS})
+    types.update({field: pyarrow.list_(pyarrow.string()) for field in LIST_FIELDS})
+    return pyarrow.schema([(field, types[field]) for field in FIELDS])
+
+
+class SenseWriter(abc.ABC):
+    """
+    Base class of exporters
+    """
+    @abc.abstractmethod
+    def write(self, record: SenseRecord) -> None:
+        ...
+
+    def write_many(self, records: Iterable[SenseRecord]) -> None:
+        for record in records:
+            self.write(record)
+
+    def write_result(self, result: list[RESULT_FORMAT]) -> None:
+        """
+        Writes every sense of define()/parse_page() result
+        """
+        self.write_many(result_to_sense_records(result))
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        ...
+
+    def __enter__(self) -> "SenseWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JSONLinesWriter(SenseWriter):
+    def __init__(self, path: str):
+        self._file: IO[str] = open(path, "w", encoding="utf-8")
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def write(self, record: SenseRecord) -> None:
+        self._file.write(self._encoder.encode(record))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MessagePackWriter(SenseWriter):
+    def __init__(self, path: str):
+        import msgpack
+
+        self._file: IO[bytes] = open(path, "wb")
+        self._packer = msgpack.Packer()
+
+    def write(self, record: SenseRecord) -> None:
+        self._file.write(self._packer.pack(record))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ColumnarWriter(SenseWriter):
+    """
+    Buffers up to batch_size records column by column and writes them as a single record batch
+    """
+    def __init__(self, batch_size: int):
+        import pyarrow
+
+        self._pyarrow = pyarrow
+        self.schema = arrow_schema()
+        self.batch_size = batch_size
+        self._columns: dict[str, list[Any]] = {field: [] for field in FIELDS}
+        self._buffered = 0
+
+    def write(self, record: SenseRecord) -> None:
+        for field, column in self._columns.items():
+            column.append(record[field])
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        batch = self._pyarrow.record_batch(list(self._columns.values()), schema=self.schema)
+        self._write_batch(batch)
+        for column in self._columns.values():
+            column.clear()
+        self._buffered = 0
+
+    @abc.abstractmethod
+    def _write_batch(self, batch) -> None:
+        ...
+
+
+class ParquetWriter(_ColumnarWriter):
+    """
+    batch_size: int
+    |   Number of records in a row group
+    """
+    def __init__(self, path: str, batch_size: int = 50_000, compression: str = "zstd"):
+        import pyarrow.parquet
+
+        super().__init__(batch_size)
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression=compression)
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+
+class ArrowWriter(_ColumnarWriter):
+    """
+    Writes uncompressed Arrow IPC file, which read_arrow() maps into memory without copying
+    """
+    def __init__(self, path: str, batch_size: int = 50_000):
+        super().__init__(batch_size)
+        self._sink = self._pyarrow.OSFile(path, "wb")
+        self._writer = self._pyarrow.ipc.new_file(self._sink, self.schema)
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+        self._sink.close()
+
+
+WRITERS = {".jsonl":   JSONLinesWriter,
+           ".msgpack": MessagePackWriter,
+           ".parquet": ParquetWriter,
+           ".arrow":   ArrowWriter}
+
+
+def open_writer(path: str, **writer_kwargs) -> SenseWriter:
+    """
+    Creates writer of the format that corresponds to the extension of path (see WRITERS)
+    """
+    for extension, writer_class in WRITERS.items():
+        if path.endswith(extension):
+            return writer_class(path, **writer_kwargs)
+    raise ValueError(f"Unknown export format of {path}. Supported extensions: {', '.join(WRITERS)}")
+
+
+def read_jsonl(path: str) -> Iterator[SenseRecord]:
+    with open(path, encoding="utf-8") as records_file:
+        for line in records_file:
+            yield json.loads(line)
+
+
+def read_msgpack(path: str) -> Iterator[SenseRecord]:
+    import msgpack
+
+    with open(path, "rb") as records_file:
+        yield from msgpack.Unpacker(records_file, raw=False)
+
+
+def read_parquet(path: str, columns: Optional[list[str]] = None):
+    """
+    Returns pyarrow.Table. Only requested columns are read.
+    """
+    import pyarrow.parquet
+
+    return pyarrow.parquet.read_table(path, columns=columns, memory_map=True)
+
+
+def read_arrow(path: str):
+    """
+    Returns pyarrow.Table backed by memory-mapped file: data is paged in on access
+    and is not copied into process memory. The file is closed before returning;
+    the mapping is held by buffers of the table and is released together with them.
+    """
+    import pyarrow
+
+    with pyarrow.memory_map(path, "r") as source:
+        return pyarrow.ipc.open_file(source).read_all()
@@ -0,0 +1,348 @@
+"""
+Implementation of the "lxml-direct" parser backend of cambridge_parser.
+Mirrors BeautifulSoup-based extraction of cambridge_parser step by step and gives the same output,
+but searches with precompiled XPath expressions instead of Python-level tree walks.
+"""
+import lxml.etree
+import lxml.html
+import time
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from cambridge_parser import (LINK_PREFIX, ALT_TERMS_T, DOMAINS_T, IRREGULAR_FORMS_T, LABELS_AND_CODES_T,
+                              LEVEL_T, REGIONS_T, UK_AUDIO_LINKS_T, UK_IPA_T, US_AUDIO_LINKS_T,
+                              US_IPA_T, USAGES_T, DEFINITION_T, SENSE_FIELDS_T)
+from cambridge_metrics import get_observer
+
+
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def _class_xpath(axis: str, html_tag: str, class_name: str) -> lxml.etree.XPath:
+    # Same matching rules as BeautifulSoup's {"class": class_name}: class_name is either
+    # one of the classes of the tag or the whole (whitespace-normalized) class attribute.
+    if " " in class_name:
+        condition = f"normalize-space(@class)='{class_name}'"
+    else:
+        condition = f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+    return lxml.etree.XPath(f"{axis}::{html_tag}[{condition}]")
+
+
+def _find_all(element: lxml.html.HtmlElement, html_tag: str, class_name: str) -> list[lxml.html.HtmlElement]:
+    return _class_xpath("descendant", html_tag, class_name)(element)
+
+
+def _find(element: lxml.html.HtmlElement, html_tag: str, class_name: str) -> Optional[lxml.html.HtmlElement]:
+    found = _class_xpath("descendant", html_tag, class_name)(element)
+    return found[0] if found else None
+
+
+def _find_parent(element: lxml.html.HtmlElement, html_tag: str, class_name: str) -> Optional[lxml.html.HtmlElement]:
+    found = _class_xpath("ancestor", html_tag, class_name)(element)
+    return found[-1] if found else None
+
+
+def _classes(element: lxml.html.HtmlElement) -> Optional[list[str]]:
+    class_attr = element.get("class")
+    return class_attr.split() if class_attr is not None else None
+
+
+def _text(element: lxml.html.HtmlElement) -> str:
+    return str(element.text_content())
+
+
+_find_di_bodies    = lxml.etree.XPath("descendant-or-self::div[contains(concat(' ', normalize-space(@class), ' '), ' di-body ')]")
+_find_entry_blocks = lxml.etree.XPath("descendant::div[contains(@class, 'entry-body__el')]")
+_find_amp_img      = lxml.etree.XPath("descendant::amp-img[1]")
+_find_source       = lxml.etree.XPath("descendant::source[1]")
+
+
+def get_tags(tags_section: Optional[lxml.html.HtmlElement]) -> tuple[LEVEL_T,
+                                                                      LABELS_AND_CODES_T,
+                                                                      REGIONS_T,
+                                                                      USAGES_T,
+                                                                      DOMAINS_T]:
+    def is_own_tag(tag: lxml.html.HtmlElement) -> bool:
+        tag_grandparent = _classes(tag.getparent().getparent()) or []
+        # var - var dvar; group - inf-group dinfg
+        return not any("var" in x or "group" in x for x in tag_grandparent)
+
+    def find_tag(html_tag: str, class_name: str) -> str:
+        if tags_section is None:
+            return ""
+
+        found_tag = _find(tags_section, html_tag, class_name)
+        if found_tag is None:
+            return ""
+        return _text(found_tag) if is_own_tag(found_tag) else ""
+
+    def find_all_tags(html_tag: str, class_name: str) -> list[str]:
+        tags: list[str] = []
+        if tags_section is None:
+            return tags
+
+        for tag in _find_all(tags_section, html_tag, class_name):
+            if is_own_tag(tag):
+                tag_text = _text(tag).strip()
+                if tag_text:
+                    tags.append(tag_text)
+        return tags
+
+    level            = find_tag(     "span", "epp-xref")
+    labels_and_codes = find_all_tags("span", "gram dgram")
+    region           = find_all_tags("span", "region dregion")
+    usage            = find_all_tags("span", "usage dusage")
+    domain           = find_all_tags("span", "domain ddomain")
+    return level, labels_and_codes, region, usage, domain
+
+
+def get_phonetics(header_block: Optional[lxml.html.HtmlElement]) -> tuple[UK_IPA_T,
+                                                                           US_IPA_T,
+                                                                           UK_AUDIO_LINKS_T,
+                                                                           US_AUDIO_LINKS_T]:
+    uk_ipa: UK_IPA_T = []
+    us_ipa: US_IPA_T = []
+    uk_audio_links: UK_AUDIO_LINKS_T = []
+    us_audio_links: US_AUDIO_LINKS_T = []
+    if header_block is None:
+        return uk_ipa, us_ipa, uk_audio_links, us_audio_links
+
+    for daud in _find_all(header_block, "span", "daud"):
+        parent_class = [item.lower() for item in _classes(daud.getparent()) or []]
+        audio_source = _find_source(daud)
+        if not audio_source:
+            continue
+        audio_source_link = audio_source[0].get("src")
+        if not audio_source_link:  # None or empty
+            continue
+
+        result_audio_link = f"{LINK_PREFIX}/{audio_source_link}"
+        if "uk" in parent_class:
+            uk_audio_links.append(result_audio_link)
+        elif "us" in parent_class:
+            us_audio_links.append(result_audio_link)
+
+    prev_ipa_parrent: list[str] = []
+    for child in _find_all(header_block, "span", "pron dpron"):
+        ipa_parent = _classes(child.getparent())
+
+        if ipa_parent is None:
+            ipa_parent = prev_ipa_parrent
+        else:
+            prev_ipa_parrent = ipa_parent
+
+        if "uk" in ipa_parent:
+            uk_ipa.append(_text(child))
+        else:
+            us_ipa.append(_text(child))
+    return uk_ipa, us_ipa, uk_audio_links, us_audio_links
+
+
+def concatenate_tags(tag_section:             Optional[lxml.html.HtmlElement],
+                     global_level:            LEVEL_T,
+                     global_labels_and_codes: LABELS_AND_CODES_T,
+                     global_region:           REGIONS_T,
+                     global_usage:            USAGES_T,
+                     global_domain:           DOMAINS_T) -> tuple[LEVEL_T, LABELS_AND_CODES_T, REGIONS_T, USAGES_T, DOMAINS_T]:
+    level, labels_and_codes, region, usage, domain = get_tags(tag_section)
+
+    result_level = level if level else global_level
+    return (result_level,
+            global_labels_and_codes + labels_and_codes,
+            global_region + region,
+            global_usage + usage,
+            global_domain + domain)
+
+
+def get_irregular_forms(word_header_block: Optional[lxml.html.HtmlElement]) -> IRREGULAR_FORMS_T:
+    forms: IRREGULAR_FORMS_T = []
+    if word_header_block is None:
+        return forms
+
+    all_irreg_forms_block = _find(word_header_block, "span", "irreg-infls dinfls")
+    if all_irreg_forms_block is None:
+        return forms
+
+    for irreg_form_block in all_irreg_forms_block:
+        text = []
+        for containing_tag in irreg_form_block:
+            if not isinstance(containing_tag.tag, str):  # comments and processing instructions
+                continue
+            tag_class = _classes(containing_tag)
+            if tag_class is not None and not any("dpron" in x for x in tag_class):
+                text.append(_text(containing_tag))
+        if (joined_text := " ".join(text)):
+            forms.append(joined_text)
+    return forms
+
+
+def get_alt_terms(word_header_block: Optional[lxml.html.HtmlElement]) -> ALT_TERMS_T:
+    if word_header_block is None:
+        return []
+
+    var_block = _find_all(word_header_block, "span", "var dvar")
+    var_block.extend(_find_all(word_header_block, "span", "spellvar dspellvar"))
+    return [_text(alt_term) for alt_term in var_block]
+
+
+def iter_sense_fields(primal_block: lxml.html.HtmlElement) -> Iterator[SENSE_FIELDS_T]:
+    observer = get_observer()
+    if observer is not None:
+        started_at = time.perf_counter()
+    main_block = _find_entry_blocks(primal_block)
+    main_block.extend(_find_all(primal_block, "div", "pr dictionary"))
+    main_block.extend(_find_all(primal_block, "div", "pv-block"))
+    main_block.extend(_find_all(primal_block, "div", "pr idiom-block"))
+    if observer is not None:
+        observer.on_timing("main_blocks", time.perf_counter() - started_at)
+        observer.on_count("entities", len(main_block))
+
+    for entity in main_block:
+        header_block = _find(entity, "div", "dpos-h")
+        pos_alt_terms_list = get_alt_terms(header_block)
+        pos_irregular_forms_list = get_irregular_forms(header_block)
+
+        parsed_word_block = _find(entity, "h2", "headword")
+        if parsed_word_block is None and header_block is not None:
+            parsed_word_block = _find(header_block, "h2", "di-title")
+        if parsed_word_block is None and header_block is not None:
+            parsed_word_block = _find(header_block, "div", "di-title")
+        header_word = _text(parsed_word_block) if parsed_word_block is not None else ""
+
+        pos_block = _find_all(header_block, "span", "pos dpos") if header_block is not None else []
+        pos = []
+        i = 0
+        while i < len(pos_block):
+            i_pos = _text(pos_block[i])
+            pos.append(i_pos)
+            if i_pos == "phrasal verb":  # after "phrasal verb" goes verb that was
+                i += 1                   # used in a construction of this phrasal verb. We skip it.
+            i += 1
+        uk_ipa, us_ipa, uk_audio_links, us_audio_links = get_phonetics(header_block)
+
+        # data gathered from the word header
+        pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains = get_tags(header_block)
+
+        if observer is not None:
+            def_blocks_time = 0.0
+            senses_count = 0
+            resumed_at = time.perf_counter()
+        for def_and_sent_block in _find_all(entity, "div", "def-block ddef_block"):
+            definition:                    DEFINITION_T       = ""
+            alt_terms:                     ALT_TERMS_T        = []
+            irregular_forms:               IRREGULAR_FORMS_T  = []
+            current_word_level:            LEVEL_T            = ""
+            current_word_labels_and_codes: LABELS_AND_CODES_T = []
+            current_word_regions:          REGIONS_T          = []
+            current_word_usages:           USAGES_T           = []
+            current_word_domains:          DOMAINS_T          = []
+
+            current_def_block_word = header_word
+
+            image_section = _find(def_and_sent_block, "div", "dimg")
+            image_link = ""
+            if image_section is not None:
+                image_link_block = _find_amp_img(image_section)
+                if image_link_block:
+                    image_link = LINK_PREFIX + image_link_block[0].get("src", "")
+
+            # sentence examples
+            sentences_and_translation_block = _find(def_and_sent_block, "div", "def-body")
+            definition_translation = ""
+            sentence_blocks = []
+            if sentences_and_translation_block is not None:
+                definition_translation_block = _find(sentences_and_translation_block, "span", "trans")
+                definition_translation = _text(definition_translation_block) if definition_translation_block is not None else ""
+                sentence_blocks = _find_all(sentences_and_translation_block, "div", "examp dexamp")
+
+            examples = []
+            examples_translations = []
+            for item in sentence_blocks:
+                sent_ex = _find(item, "span", "eg")
+                sent_translation = _find(item, "span", "trans")
+                examples.append(_text(sent_ex) if sent_ex is not None else "")
+                examples_translations.append(_text(sent_translation) if sent_translation is not None else "")
+
+            found_definition_block = _find(def_and_sent_block, "div", "ddef_h")
+
+            if found_definition_block is not None:
+                found_definition_string = _find(found_definition_block, "div", "def ddef_d db")
+                definition = "" if found_definition_string is None else _text(found_definition_string)
+
+                # Gathering specific tags for every word usage
+                tag_section = _find(found_definition_block, "span", "def-info")
+                current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
+                    concatenate_tags(tag_section, pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains)
+
+                alt_terms = get_alt_terms(found_definition_block)
+                irregular_forms = get_irregular_forms(found_definition_block)
+
+                phrase_block = _find_parent(found_definition_block, "div", "phrase-block")
+                if phrase_block is not None:
+                    phrase_tags_section = _find(phrase_block, "span", "phrase-info")
+                    if phrase_tags_section is not None:
+                        alt_terms += get_alt_terms(phrase_tags_section)
+                        irregular_forms += get_irregular_forms(phrase_tags_section)
+
+                        current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
+                            concatenate_tags(phrase_tags_section,
+                                             current_word_level,
+                                             current_word_labels_and_codes,
+                                             current_word_regions,
+                                             current_word_usages,
+                                             current_word_domains)
+                    current_def_block_word = _text(_find(phrase_block, "span", "phrase-title"))
+
+            if observer is not None:
+                def_blocks_time += time.perf_counter() - resumed_at
+                senses_count += 1
+            yield dict(word=current_def_block_word,
+                       pos=pos,
+                       definition_translation=definition_translation,
+                       definition=definition,
+                       alt_terms=pos_alt_terms_list + alt_terms,
+                       irregular_forms=irregular_forms + pos_irregular_forms_list,
+                       examples=examples,
+                       examples_translations=examples_translations,
+                       level=current_word_level,
+                       labels_and_codes=current_word_labels_and_codes,
+                       regions=current_word_regions,
+                       usages=current_word_usages,
+                       domains=current_word_domains,
+                       image_link=image_link,
+                       uk_ipa=uk_ipa,
+                       us_ipa=us_ipa,
+                       uk_audio_links=uk_audio_links,
+                       us_audio_links=us_audio_links)
+            if observer is not None:
+                resumed_at = time.perf_counter()
+
+        if observer is not None:
+            def_blocks_time += time.perf_counter() - resumed_at
+            observer.on_timing("def_blocks", def_blocks_time)
+            observer.on_count("senses", senses_count)
+
+
+def find_sections(html: bytes | str) -> list[lxml.html.HtmlElement]:
+    """
+    Same as cambridge_parser._find_sections() with "lxml-direct" backend
+    """
+    observer = get_observer()
+    if observer is not None:
+        started_at = time.perf_counter()
+    try:
+        if isinstance(html, bytes):
+            root = lxml.html.document_fromstring(html, parser=_HTML_PARSER)
+        else:
+            root = lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:  # empty document
+        return []
+    if observer is not None:
+        observer.on_timing("tree_build", time.perf_counter() - started_at)
+    return _find_di_bodies(root)
+
+
+def serialize_section(primal_block: lxml.html.HtmlElement) -> bytes:
+    # the tail is markup after the section (ads, scripts, ...), not a part of it
+    return lxml.etree.tostring(primal_block, encoding="utf-8", with_tail=False)
@@ -0,0 +1,142 @@
+"""
+Optional instrumentation of lookups.
+
+Functions of cambridge_parser, cambridge_cache and cambridge_async report per-stage timings
+and counters to the observer that is active in the current context (see observe()).
+When no observer is active, reporting costs a single context variable lookup.
+
+Stages (seconds):
+    request      - until response headers are received (DNS, connection, TLS, server time)
+    download     - receiving response body
+    tree_build   - building HTML tree (BeautifulSoup or lxml)
+    main_blocks  - gathering word entries of a dictionary section
+    def_blocks   - extraction of senses from word entries
+    parse        - whole parse_page() call
+
+Counters:
+    requests, retries (async only), bytes_downloaded, sections, entities, senses,
+    cache_hits, cache_misses, cache_stale, cache_revalidated, cache_stale_if_error, negative_cache_hits,
+    memory_cache_hits, memory_cache_misses, memory_cache_coalesced
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator, Optional, Protocol
+
+if TYPE_CHECKING:
+    import logging
+
+
+class Observer(Protocol):
+    def on_timing(self, stage: str, seconds: float) -> None:
+        ...
+
+    def on_count(self, name: str, value: int = 1) -> None:
+        ...
+
+
+_current_observer: ContextVar[Optional[Observer]] = ContextVar("cambridge_observer", default=None)
+
+
+def get_observer() -> Optional[Observer]:
+    return _current_observer.get()
+
+
+@contextmanager
+def observe(observer: Observer) -> Iterator[Observer]:
+    """
+    Makes observer active in the current context:
+
+        with observe(StatsCollector()) as stats:
+            define("run")
+        print(stats.summary())
+
+    Worker threads of define_many() and async tasks started inside the block inherit it.
+    """
+    token = _current_observer.set(observer)
+    try:
+        yield observer
+    finally:
+        _current_observer.reset(token)
+
+
+class StatsCollector:
+    """
+    Observer that aggregates timings and counters. Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings: defaultdict[str, float] = defaultdict(float)
+        self.timing_counts: defaultdict[str, int] = defaultdict(int)
+        self.counters: defaultdict[str, int] = defaultdict(int)
+
+    def on_timing(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[stage] += seconds
+            self.timing_counts[stage] += 1
+
+    def on_count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            return {"timings":       dict(self.timings),
+                    "timing_counts": dict(self.timing_counts),
+                    "counters":      dict(self.counters)}
+
+
+class CompositeObserver:
+    """
+    Forwards events to several observers
+    """
+    def __init__(self, *observers: Observer):
+        self.observers = observers
+
+    def on_timing(self, stage: str, seconds: float) -> None:
+        for observer in self.observers:
+            observer.on_timing(stage, seconds)
+
+    def on_count(self, name: str, value: int = 1) -> None:
+        for observer in self.observers:
+            observer.on_count(name, value)
+
+
+class LoggingObserver:
+    """
+    Logs every event (at DEBUG level by default)
+    """
+    def __init__(self, logger: Optional["logging.Logger"] = None, level: Optional[int] = None):
+        import logging
+
+        self.logger = logger if logger is not None else logging.getLogger("cambridge_parser")
+        self.level = level if level is not None else logging.DEBUG
+
+    def on_timing(self, stage: str, seconds: float) -> None:
+        self.logger.log(self.level, "%s took %.3f ms", stage, seconds * 1000)
+
+    def on_count(self, name: str, value: int = 1) -> None:
+        self.logger.log(self.level, "%s += %d", name, value)
+
+
+class PrometheusObserver:
+    """
+    Exports events as Prometheus metrics:
+    <namespace>_stage_seconds histogram and <namespace>_events_total counter labeled by event name.
+    Requires prometheus_client.
+    """
+    def __init__(self, namespace: str = "cambridge", registry=None):
+        import prometheus_client
+
+        kwargs = {"registry": registry} if registry is not None else {}
+        self.stage_seconds = prometheus_client.Histogram("stage_seconds", "Time spent in lookup stages",
+                                                         ["stage"], namespace=namespace, **kwargs)
+        self.events = prometheus_client.Counter("events", "Lookup counters",
+                                                ["name"], namespace=namespace, **kwargs)
+
+    def on_timing(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.labels(stage=stage).observe(seconds)
+
+    def on_count(self, name: str, value: int = 1) -> None:
+        self.events.labels(name=name).inc(value)
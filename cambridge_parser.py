@@ -1,8 +1,22 @@
-import bs4
-import requests
-from typing import Optional, TypedDict, Literal
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Protocol, TypedDict, Literal, get_args
 from enum import IntEnum, auto
+import contextvars
 import re
+import time
+import urllib.parse
+
+from cambridge_cache import DiskCache, make_cache_key
+from cambridge_metrics import get_observer
+
+# requests, bs4 and concurrent.futures are imported on first use: offline tools
+# and parsing workers that use other backends start faster without them
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+    import bs4
+    import requests
 
 
 DEFAULT_REQUESTS_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; Win64; x64)'}
@@ -55,6 +69,93 @@ class POSData(TypedDict):
 RESULT_FORMAT = dict[WORD_T, list[POSData]]
 
 
+class SenseRecord(TypedDict):
+    """
+    Single self-contained sense (definition) yielded by iter_parse_page()
+    """
+    dictionary_index:       int  # index of the dictionary section on the page
+    word:                   WORD_T
+    POS:                    POS_T
+    definition:             DEFINITION_T
+    definition_translation: DEFINITION_TRANSLATION_T
+    examples:               EXAMPLES_T
+    examples_translations:  EXAMPLES_TRANSLATIONS_T
+    image_link:             IMAGE_LINK_T
+    level:                  LEVEL_T
+    labels_and_codes:       LABELS_AND_CODES_T
+    regions:                REGIONS_T
+    usages:                 USAGES_T
+    domains:                DOMAINS_T
+    alt_terms:              ALT_TERMS_T
+    irregular_forms:        IRREGULAR_FORMS_T
+    UK_IPA:                 UK_IPA_T
+    US_IPA:                 US_IPA_T
+    UK_audio_links:         UK_AUDIO_LINKS_T
+    US_audio_links:         US_AUDIO_LINKS_T
+
+
+# keyword arguments of update_word_dict() / make_sense_record() gathered for a single sense
+SENSE_FIELDS_T = dict[str, Any]
+
+
+class CompactHeader(NamedTuple):
+    """
+    Header-level data of a word entry. Shared by reference between all its senses.
+    """
+    POS:            tuple[str, ...]
+    UK_IPA:         tuple[str, ...]
+    US_IPA:         tuple[str, ...]
+    UK_audio_links: tuple[str, ...]
+    US_audio_links: tuple[str, ...]
+
+
+class CompactSense(NamedTuple):
+    """
+    Memory efficient alternative of SenseRecord produced by parse_page_compact().
+    Lists are replaced with tuples; tags, terms and header data are deduplicated.
+    """
+    word:                   WORD_T
+    header:                 CompactHeader
+    definition:             DEFINITION_T
+    definition_translation: DEFINITION_TRANSLATION_T
+    examples:               tuple[str, ...]
+    examples_translations:  tuple[str, ...]
+    image_link:             IMAGE_LINK_T
+    level:                  LEVEL_T
+    labels_and_codes:       tuple[str, ...]
+    regions:                tuple[str, ...]
+    usages:                 tuple[str, ...]
+    domains:                tuple[str, ...]
+    alt_terms:              tuple[str, ...]
+    irregular_forms:        tuple[str, ...]
+
+
+# senses of a single dictionary section of a page
+COMPACT_SECTION_T = list[CompactSense]
+
+
+class HeadwordPhonetics(TypedDict):
+    UK_IPA:         UK_IPA_T
+    US_IPA:         US_IPA_T
+    UK_audio_links: UK_AUDIO_LINKS_T
+    US_audio_links: US_AUDIO_LINKS_T
+
+
+# dictionary type of monolingual dictionary or name of bilingual variation
+DICTIONARY_KEY_T = str
+
+
+class MultiDictionaryResult(TypedDict):
+    """
+    Result of define_all_variations()
+    """
+    word:         WORD_T
+    dictionaries: dict[DICTIONARY_KEY_T, list[RESULT_FORMAT]]
+    errors:       dict[DICTIONARY_KEY_T, Exception]
+    # IPA and audio links of every headword gathered from all dictionaries without repetitions
+    phonetics:    dict[WORD_T, HeadwordPhonetics]
+
+
 DictionaryType = Literal[
     "english",
     "learner-english",
@@ -91,50 +192,55 @@ BilingualVariations = Literal[
 ]
 
 
+# "html.parser" and "lxml" are BeautifulSoup tree builders. 
+# "lxml-direct" skips BeautifulSoup altogether (see cambridge_lxml) and is the fastest one.
+# "lxml" and "lxml-direct" require lxml to be installed.
+ParserBackend = Literal[
+    "html.parser",
+    "lxml",
+    "lxml-direct",
+]
+
+
+def _is_own_tag(tag: bs4.Tag) -> bool:
+    tag_grandparent = tag.parent.parent.get("class")
+    # var - var dvar; group - inf-group dinfg
+    return not any("var" in x or "group" in x for x in tag_grandparent)
+
+
 def get_tags(tags_section: Optional[bs4.Tag]) -> tuple[LEVEL_T, 
                                                        LABELS_AND_CODES_T, 
                                                        REGIONS_T, 
                                                        USAGES_T, 
                                                        DOMAINS_T]:
-    def find_tag(html_tag: str, params: dict) -> str:
-        nonlocal tags_section
-
-        if tags_section is None:
-            return ""
-
-        found_tag = tags_section.find(html_tag, params)
-        if found_tag is None:
-            return ""
-
-        tag_grandparent = found_tag.parent.parent.get("class")
-        # var - var dvar; group - inf-group dinfg
-        if not any("var" in x or "group" in x for x in tag_grandparent):
-            tag_text = found_tag.text
-            return tag_text
-        return ""
-
-    def find_all_tags(html_tag: str, params: dict) -> list[str]:
-        nonlocal tags_section
-
-        tags: list[str] = []
-        if tags_section is None:
-            return tags
-
-        found_tags = tags_section.find_all(html_tag, params)
-        for tag in found_tags:
-            tag_grandparent = tag.parent.parent.get("class")
-            # var - var dvar; group - inf-group dinfg
-            if not any("var" in x or "group" in x for x in tag_grandparent):
-                tag_text = tag.text.strip()
-                if tag_text:
-                    tags.append(tag_text)
-        return tags
-
-    level            = find_tag(     "span", {"class": "epp-xref"})
-    labels_and_codes = find_all_tags("span", {"class": "gram dgram"})
-    region           = find_all_tags("span", {"class": "region dregion"})
-    usage            = find_all_tags("span", {"class": "usage dusage"})
-    domain           = find_all_tags("span", {"class": "domain ddomain"})
+    level:            LEVEL_T            = ""
+    labels_and_codes: LABELS_AND_CODES_T = []
+    region:           REGIONS_T          = []
+    usage:            USAGES_T           = []
+    domain:           DOMAINS_T          = []
+    if tags_section is None:
+        return level, labels_and_codes, region, usage, domain
+
+    # single pass over the section; tags are dispatched by their class attribute
+    tag_lists = {"gram dgram":      labels_and_codes,
+                 "region dregion":  region,
+                 "usage dusage":    usage,
+                 "domain ddomain":  domain}
+    level_found = False
+    for tag in tags_section.find_all("span", class_=True):
+        tag_class = tag["class"]
+        # only the first level tag is considered
+        if not level_found and "epp-xref" in tag_class:
+            level_found = True
+            if _is_own_tag(tag):
+                level = tag.text
+            continue
+
+        tag_list = tag_lists.get(" ".join(tag_class))
+        if tag_list is not None and _is_own_tag(tag):
+            tag_text = tag.text.strip()
+            if tag_text:
+                tag_list.append(tag_text)
     return level, labels_and_codes, region, usage, domain
 
 def get_phonetics(
@@ -202,34 +308,61 @@ def concatenate_tags(tag_section:             Optional[bs4.Tag],
 BLANKS_REMOVING_PATTERN = re.compile(r"(\s{2,})|(\r\n|\r|\n)+")
 
 
-def update_word_dict(word_dict:              RESULT_FORMAT,
-                     word:                   Optional[WORD_T]                   =None,
-                     pos:                    Optional[POS_T]                    =None,
-                     definition:             Optional[DEFINITION_T]             =None,
-                     definition_translation: Optional[DEFINITION_TRANSLATION_T] =None,
-                     alt_terms:              Optional[ALT_TERMS_T]              =None, 
-                     irregular_forms:        Optional[IRREGULAR_FORMS_T]        =None,
-                     examples:               Optional[EXAMPLES_T]               =None,
-                     examples_translations:  Optional[EXAMPLES_TRANSLATIONS_T] = None,
-                     level:                  Optional[LEVEL_T]                  =None,
-                     labels_and_codes:       Optional[LABELS_AND_CODES_T]       =None,
-                     regions:                Optional[REGIONS_T]                =None,
-                     usages:                 Optional[USAGES_T]                 =None,
-                     domains:                Optional[DOMAINS_T]                =None,
-                     image_link:             Optional[IMAGE_LINK_T]             =None,
-                     uk_ipa:                 Optional[UK_IPA_T]                 =None,
-                     us_ipa:                 Optional[US_IPA_T]                 =None,
-                     uk_audio_links:         Optional[UK_AUDIO_LINKS_T]         =None,
-                     us_audio_links:         Optional[US_AUDIO_LINKS_T]         =None):
-    
-    def remove_blanks_from_str(src: str) -> str:
-        return re.sub(BLANKS_REMOVING_PATTERN, " ", src.strip())
-
-    def remove_blanks_from_list(src: list[str]) -> list[str]:
-        return [remove_blanks_from_str(item) for item in src]
-
-    word = remove_blanks_from_str(word) if word is not None else ""
-    pos = remove_blanks_from_list(pos) if pos is not None else []
+def remove_blanks_from_str(src: str) -> str:
+    return re.sub(BLANKS_REMOVING_PATTERN, " ", src.strip())
+
+
+def remove_blanks_from_list(src: list[str]) -> list[str]:
+    return [remove_blanks_from_str(item) for item in src]
+
+
+def make_sense_record(dictionary_index:       int                                =0,
+                      word:                   Optional[WORD_T]                   =None,
+                      pos:                    Optional[POS_T]                    =None,
+                      definition:             Optional[DEFINITION_T]             =None,
+                      definition_translation: Optional[DEFINITION_TRANSLATION_T] =None,
+                      alt_terms:              Optional[ALT_TERMS_T]              =None, 
+                      irregular_forms:        Optional[IRREGULAR_FORMS_T]        =None,
+                      examples:               Optional[EXAMPLES_T]               =None,
+                      examples_translations:  Optional[EXAMPLES_TRANSLATIONS_T]  =None,
+                      level:                  Optional[LEVEL_T]                  =None,
+                      labels_and_codes:       Optional[LABELS_AND_CODES_T]       =None,
+                      regions:                Optional[REGIONS_T]                =None,
+                      usages:                 Optional[USAGES_T]                 =None,
+                      domains:                Optional[DOMAINS_T]                =None,
+                      image_link:             Optional[IMAGE_LINK_T]             =None,
+                      uk_ipa:                 Optional[UK_IPA_T]                 =None,
+                      us_ipa:                 Optional[US_IPA_T]                 =None,
+                      uk_audio_links:         Optional[UK_AUDIO_LINKS_T]         =None,
+                      us_audio_links:         Optional[US_AUDIO_LINKS_T]         =None) -> SenseRecord:
+    return {"dictionary_index":       dictionary_index,
+            "word":                   remove_blanks_from_str(word)                   if word                   is not None else "",
+            "POS":                    remove_blanks_from_list(pos)                   if pos                    is not None else [],
+            "definition":             remove_blanks_from_str(definition.strip(": ")) if definition             is not None else "",
+            "definition_translation": remove_blanks_from_str(definition_translation) if definition_translation is not None else "",
+            "examples":               remove_blanks_from_list(examples)              if examples               is not None else [],
+            "examples_translations":  remove_blanks_from_list(examples_translations) if examples_translations  is not None else [],
+            "image_link":             remove_blanks_from_str(image_link)             if image_link             is not None else "",
+            "level":                  remove_blanks_from_str(level)                  if level                  is not None else "",
+            "labels_and_codes":       remove_blanks_from_list(labels_and_codes)      if labels_and_codes       is not None else [],
+            "regions":                remove_blanks_from_list(regions)               if regions                is not None else [],
+            "usages":                 remove_blanks_from_list(usages)                if usages                 is not None else [],
+            "domains":                remove_blanks_from_list(domains)               if domains                is not None else [],
+            "alt_terms":              remove_blanks_from_list(alt_terms)             if alt_terms              is not None else [],
+            "irregular_forms":        remove_blanks_from_list(irregular_forms)       if irregular_forms        is not None else [],
+            "UK_IPA":                 remove_blanks_from_list(uk_ipa)                if uk_ipa                 is not None else [],
+            "US_IPA":                 remove_blanks_from_list(us_ipa)                if us_ipa                 is not None else [],
+            "UK_audio_links":         remove_blanks_from_list(uk_audio_links)        if uk_audio_links         is not None else [],
+            "US_audio_links":         remove_blanks_from_list(us_audio_links)        if us_audio_links         is not None else []}
+
+
+def add_sense_record(word_dict: RESULT_FORMAT, record: SenseRecord) -> None:
+    """
+    Appends sense to the word_dict. Consecutive senses of a word with the same POS 
+    are grouped into a single POS block.
+    """
+    word = record["word"]
+    pos = record["POS"]
 
     if word_dict.get(word) is None:
         word_dict[word] = []
@@ -255,32 +388,68 @@ def update_word_dict(word_dict:              RESULT_FORMAT,
                                           }})
 
     last_appended_data = word_dict[word][-1]["data"]
-    last_appended_data["definitions"]             .append(remove_blanks_from_str(definition.strip(": ")) if definition             is not None else "")
-    last_appended_data["definitions_translations"].append(remove_blanks_from_str(definition_translation) if definition_translation is not None else "")
-    last_appended_data["levels"]                  .append(remove_blanks_from_str(level)                  if level                  is not None else "")
-    last_appended_data["image_links"]             .append(remove_blanks_from_str(image_link)             if image_link             is not None else "")
-    last_appended_data["UK_IPA"]                  .append(remove_blanks_from_list(uk_ipa)                if uk_ipa                 is not None else [])
-    last_appended_data["US_IPA"]                  .append(remove_blanks_from_list(us_ipa)                if us_ipa                 is not None else [])
-    last_appended_data["UK_audio_links"]          .append(remove_blanks_from_list(uk_audio_links)        if uk_audio_links         is not None else [])
-    last_appended_data["US_audio_links"]          .append(remove_blanks_from_list(us_audio_links)        if us_audio_links         is not None else [])
-    last_appended_data["examples"]                .append(remove_blanks_from_list(examples)              if examples               is not None else [])
-    last_appended_data["examples_translations"]   .append(remove_blanks_from_list(examples_translations) if examples_translations  is not None else [])
-    last_appended_data["alt_terms"]               .append(remove_blanks_from_list(alt_terms)             if alt_terms              is not None else [])
-    last_appended_data["irregular_forms"]         .append(remove_blanks_from_list(irregular_forms)       if irregular_forms        is not None else [])
-    last_appended_data["labels_and_codes"]        .append(remove_blanks_from_list(labels_and_codes)      if labels_and_codes       is not None else [])
-    last_appended_data["regions"]                 .append(remove_blanks_from_list(regions)               if regions                is not None else [])
-    last_appended_data["usages"]                  .append(remove_blanks_from_list(usages)                if usages                 is not None else [])
-    last_appended_data["domains"]                 .append(remove_blanks_from_list(domains)               if domains                is not None else [])
-                                    
-def get_irregular_forms(word_header_block: Optional[bs4.Tag]) -> IRREGULAR_FORMS_T:
-    forms: IRREGULAR_FORMS_T = []
-    if word_header_block is None:
-        return forms
+    last_appended_data["definitions"]             .append(record["definition"])
+    last_appended_data["definitions_translations"].append(record["definition_translation"])
+    last_appended_data["levels"]                  .append(record["level"])
+    last_appended_data["image_links"]             .append(record["image_link"])
+    last_appended_data["UK_IPA"]                  .append(record["UK_IPA"])
+    last_appended_data["US_IPA"]                  .append(record["US_IPA"])
+    last_appended_data["UK_audio_links"]          .append(record["UK_audio_links"])
+    last_appended_data["US_audio_links"]          .append(record["US_audio_links"])
+    last_appended_data["examples"]                .append(record["examples"])
+    last_appended_data["examples_translations"]   .append(record["examples_translations"])
+    last_appended_data["alt_terms"]               .append(record["alt_terms"])
+    last_appended_data["irregular_forms"]         .append(record["irregular_forms"])
+    last_appended_data["labels_and_codes"]        .append(record["labels_and_codes"])
+    last_appended_data["regions"]                 .append(record["regions"])
+    last_appended_data["usages"]                  .append(record["usages"])
+    last_appended_data["domains"]                 .append(record["domains"])
 
-    all_irreg_forms_block = word_header_block.find("span", {"class": "irreg-infls dinfls"})
-    if all_irreg_forms_block is None:
-        return forms
 
+def update_word_dict(word_dict:              RESULT_FORMAT,
+                     word:                   Optional[WORD_T]                   =None,
+                     pos:                    Optional[POS_T]                    =None,
+                     definition:             Optional[DEFINITION_T]             =None,
+                     definition_translation: Optional[DEFINITION_TRANSLATION_T] =None,
+                     alt_terms:              Optional[ALT_TERMS_T]              =None, 
+                     irregular_forms:        Optional[IRREGULAR_FORMS_T]        =None,
+                     examples:               Optional[EXAMPLES_T]               =None,
+                     examples_translations:  Optional[EXAMPLES_TRANSLATIONS_T] = None,
+                     level:                  Optional[LEVEL_T]                  =None,
+                     labels_and_codes:       Optional[LABELS_AND_CODES_T]       =None,
+                     regions:                Optional[REGIONS_T]                =None,
+                     usages:                 Optional[USAGES_T]                 =None,
+                     domains:                Optional[DOMAINS_T]                =None,
+                     image_link:             Optional[IMAGE_LINK_T]             =None,
+                     uk_ipa:                 Optional[UK_IPA_T]                 =None,
+                     us_ipa:                 Optional[US_IPA_T]                 =None,
+                     uk_audio_links:         Optional[UK_AUDIO_LINKS_T]         =None,
+                     us_audio_links:         Optional[US_AUDIO_LINKS_T]         =None):
+    record = make_sense_record(word=word,
+                               pos=pos,
+                               definition=definition,
+                               definition_translation=definition_translation,
+                               alt_terms=alt_terms,
+                               irregular_forms=irregular_forms,
+                               examples=examples,
+                               examples_translations=examples_translations,
+                               level=level,
+                               labels_and_codes=labels_and_codes,
+                               regions=regions,
+                               usages=usages,
+                               domains=domains,
+                               image_link=image_link,
+                               uk_ipa=uk_ipa,
+                               us_ipa=us_ipa,
+                               uk_audio_links=uk_audio_links,
+                               us_audio_links=us_audio_links)
+    add_sense_record(word_dict, record)
+
+
+def _get_irregular_forms_from_block(all_irreg_forms_block: bs4.Tag) -> IRREGULAR_FORMS_T:
+    import bs4
+
+    forms: IRREGULAR_FORMS_T = []
     for irreg_form_block in all_irreg_forms_block:
         text = []
         for containing_tag in (x for x in irreg_form_block if isinstance(x, bs4.Tag)):
@@ -292,23 +461,697 @@ def get_irregular_forms(word_header_block: Optional[bs4.Tag]) -> IRREGULAR_FORMS
     return forms
 
 
+def get_irregular_forms(word_header_block: Optional[bs4.Tag]) -> IRREGULAR_FORMS_T:
+    if word_header_block is None:
+        return []
+
+    all_irreg_forms_block = word_header_block.find("span", {"class": "irreg-infls dinfls"})
+    if all_irreg_forms_block is None:
+        return []
+    return _get_irregular_forms_from_block(all_irreg_forms_block)
+
+
 def get_alt_terms(word_header_block: Optional[bs4.Tag]) -> ALT_TERMS_T:
-    alt_terms: ALT_TERMS_T = []
     if word_header_block is None:
-        return alt_terms
+        return []
+
+    var_block: list[bs4.Tag] = []
+    spellvar_block: list[bs4.Tag] = []
+    for tag in word_header_block.find_all("span", class_=True):
+        tag_class = " ".join(tag["class"])
+        if tag_class == "var dvar":
+            var_block.append(tag)
+        elif tag_class == "spellvar dspellvar":
+            spellvar_block.append(tag)
+    return [alt_term.text for alt_term in var_block + spellvar_block]
+
+
+# matches classes of word entries ("pr entry-body__el", "entry-body__el clrd js-share-holder", ...)
+ENTRY_BLOCK_CLASS_PATTERN = re.compile("entry-body__el")
+
+
+def _gather_main_blocks(primal_block: bs4.Tag) -> list[bs4.Tag]:
+    # Same as concatenation of find_all() results for every kind of block, 
+    # but done in a single pass
+    entry_blocks:      list[bs4.Tag] = []
+    dictionary_blocks: list[bs4.Tag] = []
+    pv_blocks:         list[bs4.Tag] = []
+    idiom_blocks:      list[bs4.Tag] = []
+    for block in primal_block.find_all("div", class_=True):
+        block_class = block["class"]
+        joined_class = " ".join(block_class)
+        if ENTRY_BLOCK_CLASS_PATTERN.search(joined_class) is not None:
+            entry_blocks.append(block)
+        if joined_class == "pr dictionary":
+            dictionary_blocks.append(block)
+        if "pv-block" in block_class:
+            pv_blocks.append(block)
+        if joined_class == "pr idiom-block":
+            idiom_blocks.append(block)
+    return entry_blocks + dictionary_blocks + pv_blocks + idiom_blocks
+
+
+class _DefBlockParts:
+    """
+    Parts of a "def-block ddef_block" found by _scan_def_block(). 
+    Every field holds what the corresponding find()/find_all() call on the block would return.
+    """
+    __slots__ = ("image_section", "image_link_block", "sentences_and_translation_block", 
+                 "definition_translation_block", "examples", "definition_block", "definition_string", 
+                 "tag_section", "var_block", "spellvar_block", "irregular_forms_block")
+
+    def __init__(self):
+        self.image_section:                   Optional[bs4.Tag] = None  # div.dimg
+        self.image_link_block:                Optional[bs4.Tag] = None  # amp-img inside image_section
+        self.sentences_and_translation_block: Optional[bs4.Tag] = None  # div.def-body
+        self.definition_translation_block:    Optional[bs4.Tag] = None  # span.trans inside def-body
+        # [span.eg, span.trans] for every div.examp.dexamp inside def-body
+        self.examples:                        list[list[Optional[bs4.Tag]]] = []
+        self.definition_block:                Optional[bs4.Tag] = None  # div.ddef_h
+        # the rest are inside ddef_h
+        self.definition_string:               Optional[bs4.Tag] = None  # div.def.ddef_d.db
+        self.tag_section:                     Optional[bs4.Tag] = None  # span.def-info
+        self.var_block:                       list[bs4.Tag]     = []    # span.var.dvar
+        self.spellvar_block:                  list[bs4.Tag]     = []    # span.spellvar.dspellvar
+        self.irregular_forms_block:           Optional[bs4.Tag] = None  # span.irreg-infls.dinfls
+
+
+def _scan_def_block(def_block: bs4.Tag) -> _DefBlockParts:
+    """
+    Collects all parts of the definition block visiting every node of its subtree once
+    """
+    import bs4
+
+    parts = _DefBlockParts()
+
+    def scan(tag: bs4.Tag, 
+             in_image: bool, 
+             in_body: bool, 
+             in_header: bool, 
+             open_examples: tuple[list[Optional[bs4.Tag]], ...]) -> None:
+        for child in tag.children:
+            if not isinstance(child, bs4.Tag):
+                continue
+
+            child_in_image, child_in_body, child_in_header, child_examples = in_image, in_body, in_header, open_examples
+            child_class = child.get("class") or ()
+            if child.name == "div":
+                if parts.image_section is None and "dimg" in child_class:
+                    parts.image_section = child
+                    child_in_image = True
+                if parts.sentences_and_translation_block is None and "def-body" in child_class:
+                    parts.sentences_and_translation_block = child
+                    child_in_body = True
+                if parts.definition_block is None and "ddef_h" in child_class:
+                    parts.definition_block = child
+                    child_in_header = True
+                if in_body or in_header:
+                    joined_class = " ".join(child_class)
+                    if in_body and joined_class == "examp dexamp":
+                        example: list[Optional[bs4.Tag]] = [None, None]
+                        parts.examples.append(example)
+                        child_examples = open_examples + (example,)
+                    if in_header and parts.definition_string is None and joined_class == "def ddef_d db":
+                        parts.definition_string = child
+            elif child.name == "span":
+                if in_body and parts.definition_translation_block is None and "trans" in child_class:
+                    parts.definition_translation_block = child
+                for example in open_examples:
+                    if example[0] is None and "eg" in child_class:
+                        example[0] = child
+                    if example[1] is None and "trans" in child_class:
+                        example[1] = child
+                if in_header:
+                    if parts.tag_section is None and "def-info" in child_class:
+                        parts.tag_section = child
+                    joined_class = " ".join(child_class)
+                    if joined_class == "var dvar":
+                        parts.var_block.append(child)
+                    elif joined_class == "spellvar dspellvar":
+                        parts.spellvar_block.append(child)
+                    elif parts.irregular_forms_block is None and joined_class == "irreg-infls dinfls":
+                        parts.irregular_forms_block = child
+            elif child.name == "amp-img":
+                if in_image and parts.image_link_block is None:
+                    parts.image_link_block = child
+
+            scan(child, child_in_image, child_in_body, child_in_header, child_examples)
+
+    scan(def_block, in_image=False, in_body=False, in_header=False, open_examples=())
+    return parts
+
+
+# whitespace and hyphens between parts of multi-word expressions
+WORD_SEPARATORS_PATTERN = re.compile(r"[\s\-\u2010\u2011\u2013]+")
+
+
+def normalize_word(word: str) -> str:
+    """
+    Canonical form of a word the way the site spells it in links:
+    "Look up", " look  up", "look-up" -> "look-up"
+    """
+    return WORD_SEPARATORS_PATTERN.sub("-", word.strip().lower()).strip("-")
+
+
+def get_link(word: str,
+             dictionary_type: DictionaryType = "english",
+             bilingual_vairation: BilingualVariations = "") -> str:
+    if bilingual_vairation:
+        return f"{LINK_PREFIX}/dictionary/english-{bilingual_vairation}/{word}"
+    return f"{LINK_PREFIX}/dictionary/{dictionary_type}/{word}"
+
+
+def _get_redirect_target(url: str,
+                         dictionary_type: DictionaryType,
+                         bilingual_vairation: BilingualVariations) -> Optional[str]:
+    """
+    Returns headword of the dictionary page url leads to or None if url is not a page of the dictionary
+    (e.g. spellcheck page for unknown words)
+    """
+    prefix = urllib.parse.urlsplit(get_link("", dictionary_type, bilingual_vairation)).path
+    path = urllib.parse.urlsplit(url).path
+    if not path.startswith(prefix):
+        return None
+    headword = urllib.parse.unquote(path[len(prefix):].strip("/"))
+    return headword if headword and "/" not in headword else None
+
+
+class Transport(Protocol):
+    """
+    What pages are requested with: requests.Session (see make_session()) or anything else
+    that sends GET requests the same way, e.g. sessions of cambridge_transport that replay
+    recorded responses or send requests to a local stand-in of the site.
+    Returned response has to provide status_code, content, headers, url, history and elapsed
+    like requests.Response.
+    """
+    def get(self, url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        ...
+
+    def close(self) -> None:
+        ...
 
-    var_block = word_header_block.find_all("span", {"class": "var dvar"})
-    var_block.extend(word_header_block.find_all("span", {"class": "spellvar dspellvar"}))
-    for alt_term in var_block:
-        alt_terms.append(alt_term.text)
-    return alt_terms
+
+def fetch_page(word: str,
+               dictionary_type: DictionaryType = "english",
+               bilingual_vairation: BilingualVariations = "",
+               request_headers: Optional[dict]=None,
+               timeout:float=5.0,
+               session: Optional[Transport]=None,
+               cache: Optional[DiskCache]=None) -> bytes:
+    """
+    Downloads raw HTML of the page that define() would parse.
+    Arguments have the same meaning as in define(). word is normalized with normalize_word().
+
+    session: Transport
+    |   Session to send the request with. Reusing one session between calls keeps
+    |   connections alive (see make_session()). If None, a one-off request is made.
+
+    cache: cambridge_cache.DiskCache
+    |   Optional persistent page cache. Fresh cached pages are returned without
+    |   a request; stale ones are revalidated with a conditional request.
+    |   Only successful (200) responses are stored. If revalidation gets an error
+    |   response (e.g. 429 or 503), the stale page is returned.
+    |   If the site redirects the word to another headword, the redirect is remembered
+    |   and later lookups of the word request the headword page directly.
+    """
+    return _fetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache)[0]
+
+
+def _fetch_page(word: str,
+                dictionary_type: DictionaryType,
+                bilingual_vairation: BilingualVariations,
+                request_headers: Optional[dict],
+                timeout: float,
+                session: Optional[Transport],
+                cache: Optional[DiskCache]) -> tuple[bytes, bool]:
+    """
+    fetch_page() that also tells whether the page is a successful response
+    (and not an error page that mustn't be taken for a word without definitions)
+    """
+    if request_headers is None:
+        request_headers = DEFAULT_REQUESTS_HEADERS
+
+    word = normalize_word(word)
+    observer = get_observer()
+    cached_entry = None
+    if cache is not None:
+        cache_key = cache.resolve(make_cache_key(word, dictionary_type, bilingual_vairation))
+        word = cache_key[2]
+        cached_entry = cache.get(cache_key)
+        if cached_entry is None:
+            if observer is not None:
+                observer.on_count("cache_misses")
+        else:
+            if cache.is_fresh(cached_entry):
+                if observer is not None:
+                    observer.on_count("cache_hits")
+                return cached_entry.content, True
+            if observer is not None:
+                observer.on_count("cache_stale")
+
+            conditional_headers = {}
+            if cached_entry.etag is not None:
+                conditional_headers["If-None-Match"] = cached_entry.etag
+            if cached_entry.last_modified is not None:
+                conditional_headers["If-Modified-Since"] = cached_entry.last_modified
+            request_headers = {**request_headers, **conditional_headers}
+
+    link = get_link(word, dictionary_type, bilingual_vairation)
+    if session is None:
+        import requests
+        get = requests.get
+    else:
+        get = session.get
+    if observer is not None:
+        started_at = time.perf_counter()
+    # will raise error if request_headers are None
+    page = get(link, headers=request_headers, timeout=timeout)
+    if observer is not None:
+        # elapsed covers everything up to the response headers (DNS, connection, TLS, server time)
+        request_time = page.elapsed.total_seconds()
+        observer.on_timing("request", request_time)
+        observer.on_timing("download", max(time.perf_counter() - started_at - request_time, 0.0))
+        observer.on_count("requests")
+        observer.on_count("bytes_downloaded", len(page.content))
+
+    if cache is not None:
+        if page.history:
+            headword = _get_redirect_target(page.url, dictionary_type, bilingual_vairation)
+            if headword is not None and headword != word:
+                cache.put_alias(cache_key, headword)
+                cache_key = make_cache_key(headword, dictionary_type, bilingual_vairation)
+        if page.status_code == 304 and cached_entry is not None:
+            cache.mark_revalidated(cache_key)
+            if observer is not None:
+                observer.on_count("cache_revalidated")
+            return cached_entry.content, True
+        if page.status_code != 200 and cached_entry is not None:
+            # stale-if-error: throttling or failure of the site doesn't take away a stored page
+            if observer is not None:
+                observer.on_count("cache_stale_if_error")
+            return cached_entry.content, True
+        if page.status_code == 200:
+            cache.put(cache_key, 
+                      page.content, 
+                      etag=page.headers.get("ETag"), 
+                      last_modified=page.headers.get("Last-Modified"))
+    return page.content, page.status_code == 200
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """
+    Creates a session that keeps up to pool_size keep-alive connections to the 
+    dictionary host. Pass it to fetch_page()/define()/define_many() to avoid 
+    TCP+TLS handshake on every request.
+    """
+    import requests
+    import requests.adapters
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _iter_sense_fields(primal_block: bs4.Tag) -> Iterator[SENSE_FIELDS_T]:
+    observer = get_observer()
+    if observer is not None:
+        started_at = time.perf_counter()
+    main_block = _gather_main_blocks(primal_block)
+    if observer is not None:
+        observer.on_timing("main_blocks", time.perf_counter() - started_at)
+        observer.on_count("entities", len(main_block))
+
+    for entity in main_block:
+        header_block = entity.find("div", {"class": "dpos-h"})
+        pos_alt_terms_list = get_alt_terms(header_block)
+        pos_irregular_forms_list = get_irregular_forms(header_block)
+
+        parsed_word_block = entity.find("h2", {"class": "headword"})
+        if parsed_word_block is None:
+            parsed_word_block = header_block.find("h2", {"class": "di-title"}) if header_block is not None else None
+        if parsed_word_block is None:
+            parsed_word_block = header_block.find("div", {"class": "di-title"}) if header_block is not None else None
+        header_word = parsed_word_block.text if parsed_word_block is not None else ""
+
+        pos_block = header_block.find_all("span", {"class": "pos dpos"}) if header_block is not None else []
+        pos = [] 
+        i = 0
+        while i < len(pos_block):
+            i_pos = pos_block[i].text
+            pos.append(i_pos)
+            if i_pos == "phrasal verb":  # after "phrasal verb" goes verb that was 
+                i += 1                   # used in a construction of this phrasal verb. We skip it.
+            i += 1
+        uk_ipa, us_ipa, uk_audio_links, us_audio_links = get_phonetics(header_block)
+
+        # data gathered from the word header
+        pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains = get_tags(header_block)
+
+        if observer is not None:
+            # time spent by the consumer between yields is not counted
+            def_blocks_time = 0.0
+            senses_count = 0
+            resumed_at = time.perf_counter()
+        for def_and_sent_block in entity.find_all("div", {'class': 'def-block ddef_block'}):
+            definition:                    DEFINITION_T       = ""
+            alt_terms:                     ALT_TERMS_T        = []
+            irregular_forms:               IRREGULAR_FORMS_T  = []
+            current_word_level:            LEVEL_T            = ""
+            current_word_labels_and_codes: LABELS_AND_CODES_T = []
+            current_word_regions:          REGIONS_T          = []
+            current_word_usages:           USAGES_T           = []
+            current_word_domains:          DOMAINS_T          = []
+
+            current_def_block_word = header_word
+
+            parts = _scan_def_block(def_and_sent_block)
+
+            image_link = ""
+            if parts.image_link_block is not None:
+                image_link = LINK_PREFIX + parts.image_link_block.get("src", "")
+
+            # sentence examples
+            definition_translation_block = parts.definition_translation_block
+            definition_translation = definition_translation_block.text if definition_translation_block is not None else ""
+
+            examples = []
+            examples_translations = []
+            for sent_ex, sent_translation in parts.examples:
+                examples.append(sent_ex.text if sent_ex is not None else "")
+                examples_translations.append(sent_translation.text if sent_translation is not None else "")
+
+            found_definition_block = parts.definition_block
+
+            if found_definition_block is not None:
+                found_definition_string = parts.definition_string
+                definition = "" if found_definition_string is None else found_definition_string.text
+
+                # Gathering specific tags for every word usage
+                current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
+                    concatenate_tags(parts.tag_section, pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains)
+
+                alt_terms = [alt_term.text for alt_term in parts.var_block + parts.spellvar_block]
+                irregular_forms = _get_irregular_forms_from_block(parts.irregular_forms_block) \
+                                  if parts.irregular_forms_block is not None else []
+
+                phrase_block = found_definition_block.find_parent("div", {"class": "phrase-block"})
+                if phrase_block is not None:
+                    phrase_tags_section = phrase_block.find("span", {"class": "phrase-info"})
+                    if phrase_tags_section is not None:
+                        alt_terms += get_alt_terms(phrase_tags_section)
+                        irregular_forms += get_irregular_forms(phrase_tags_section)
+
+                        current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
+                            concatenate_tags(phrase_tags_section,
+                                            current_word_level,
+                                            current_word_labels_and_codes,
+                                            current_word_regions,
+                                            current_word_usages,
+                                            current_word_domains)
+                    current_def_block_word = phrase_block.find("span", {"class": "phrase-title"}).text
+
+            if observer is not None:
+                def_blocks_time += time.perf_counter() - resumed_at
+                senses_count += 1
+            yield dict(word=current_def_block_word,
+                       pos=pos,
+                       definition_translation=definition_translation,
+                       definition=definition,
+                       alt_terms=pos_alt_terms_list + alt_terms,
+                       irregular_forms=irregular_forms + pos_irregular_forms_list,
+                       examples=examples,
+                       examples_translations=examples_translations,
+                       level=current_word_level,
+                       labels_and_codes=current_word_labels_and_codes,
+                       regions=current_word_regions,
+                       usages=current_word_usages,
+                       domains=current_word_domains,
+                       image_link=image_link,
+                       uk_ipa=uk_ipa,
+                       us_ipa=us_ipa,
+                       uk_audio_links=uk_audio_links,
+                       us_audio_links=us_audio_links)
+            if observer is not None:
+                resumed_at = time.perf_counter()
+
+        if observer is not None:
+            def_blocks_time += time.perf_counter() - resumed_at
+            observer.on_timing("def_blocks", def_blocks_time)
+            observer.on_count("senses", senses_count)
+
+
+def _find_sections(html: bytes | str, parser_backend: ParserBackend) -> list[bs4.Tag]:
+    """
+    Returns dictionary sections of the page
+    """
+    import bs4
+
+    observer = get_observer()
+    if observer is not None:
+        started_at = time.perf_counter()
+    soup = bs4.BeautifulSoup(html, parser_backend)
+    if observer is not None:
+        observer.on_timing("tree_build", time.perf_counter() - started_at)
+    # Only english dictionary
+    # word block which contains definitions for every POS_T.
+    return soup.find_all("div", {'class': 'di-body'})
+
+
+def _serialize_section(primal_block: bs4.Tag) -> bytes:
+    return primal_block.encode("utf-8")
+
+
+def _get_section_functions(parser_backend: ParserBackend) -> tuple[Callable[[bytes | str], list[Any]],
+                                                                   Callable[[Any], bytes],
+                                                                   Callable[[Any], Iterator[SENSE_FIELDS_T]]]:
+    """
+    Returns (find_sections, serialize_section, iter_sense_fields) functions of the backend
+    """
+    if parser_backend == "lxml-direct":
+        import cambridge_lxml
+        return cambridge_lxml.find_sections, cambridge_lxml.serialize_section, cambridge_lxml.iter_sense_fields
+    return (lambda html: _find_sections(html, parser_backend)), _serialize_section, _iter_sense_fields
+
+
+def _iter_sections(html: bytes | str, parser_backend: ParserBackend) -> Iterator[Iterator[SENSE_FIELDS_T]]:
+    """
+    Yields lazy sense iterators, one for every dictionary section on the page
+    """
+    find_sections, _, iter_sense_fields = _get_section_functions(parser_backend)
+    observer = get_observer()
+    for primal_block in find_sections(html):
+        if observer is not None:
+            observer.on_count("sections")
+        yield iter_sense_fields(primal_block)
+
+
+def _collect_result(sections: Iterable[Iterator[SENSE_FIELDS_T]]) -> list[RESULT_FORMAT]:
+    res: list[RESULT_FORMAT] = []
+    for senses in sections:
+        word_info: RESULT_FORMAT = {}
+        for sense_fields in senses:
+            update_word_dict(word_info, **sense_fields)
+        res.append(word_info)
+    return res
+
+
+def parse_page(html: bytes | str, parser_backend: ParserBackend = "html.parser") -> list[RESULT_FORMAT]:
+    """
+    Parses already downloaded dictionary page (see fetch_page()). 
+    Doesn't touch the network, so archived pages can be (re-)parsed offline.
+    Returns the same structure as define().
+
+    parser_backend: Literal
+    |   HTML parser to use (see ParserBackend). All of them give the same result.
+    """
+    observer = get_observer()
+    if observer is not None:
+        started_at = time.perf_counter()
+    res = _collect_result(_iter_sections(html, parser_backend))
+    if observer is not None:
+        observer.on_timing("parse", time.perf_counter() - started_at)
+    return res
+
+
+def parse_page_if_changed(html: bytes | str,
+                          previous_hash: Optional[str] = None,
+                          parser_backend: ParserBackend = "html.parser") -> tuple[str, Optional[list[RESULT_FORMAT]]]:
+    """
+    Returns (sections_hash, result). sections_hash is a content hash of dictionary sections of the page,
+    so that changes of the rest of the page (ads, scripts, ...) don't affect it.
+    If it equals previous_hash, the page is not parsed and result is None.
+    Note: hashes depend on parser_backend.
+    """
+    import hashlib
+
+    find_sections, serialize_section, iter_sense_fields = _get_section_functions(parser_backend)
+    sections = find_sections(html)
+    digest = hashlib.sha256()
+    for primal_block in sections:
+        digest.update(serialize_section(primal_block))
+        digest.update(b"\0")
+    sections_hash = digest.hexdigest()
+    if sections_hash == previous_hash:
+        return sections_hash, None
+    return sections_hash, _collect_result(iter_sense_fields(primal_block) for primal_block in sections)
+
+
+def iter_parse_page(html: bytes | str, parser_backend: ParserBackend = "html.parser") -> Iterator[SenseRecord]:
+    """
+    Streaming version of parse_page(). Yields flat SenseRecord for every sense as soon 
+    as it is parsed instead of building the whole result.
+    Note: sections without senses don't produce anything.
+    """
+    for dictionary_index, senses in enumerate(_iter_sections(html, parser_backend)):
+        for sense_fields in senses:
+            yield make_sense_record(dictionary_index, **sense_fields)
+
+
+class CompactPool:
+    """
+    Deduplicates values of compact senses: equal tags, terms, IPA, links and headers 
+    are stored once. Share one pool between parse_page_compact() calls to deduplicate 
+    values across pages.
+    """
+    def __init__(self):
+        self._values: dict[Any, Any] = {}
+
+    def intern(self, value: Any) -> Any:
+        return self._values.setdefault(value, value)
+
+    def intern_strings(self, strings: list[str]) -> tuple[str, ...]:
+        if not strings:
+            return ()
+        return self.intern(tuple(self.intern(item) for item in strings))
+
+    def make_sense(self, record: SenseRecord) -> CompactSense:
+        header = self.intern(CompactHeader(POS=self.intern_strings(record["POS"]),
+                                           UK_IPA=self.intern_strings(record["UK_IPA"]),
+                                           US_IPA=self.intern_strings(record["US_IPA"]),
+                                           UK_audio_links=self.intern_strings(record["UK_audio_links"]),
+                                           US_audio_links=self.intern_strings(record["US_audio_links"])))
+        return CompactSense(word=self.intern(record["word"]),
+                            header=header,
+                            definition=record["definition"],
+                            definition_translation=record["definition_translation"],
+                            examples=tuple(record["examples"]),
+                            examples_translations=self.intern_strings(record["examples_translations"]),
+                            image_link=self.intern(record["image_link"]),
+                            level=self.intern(record["level"]),
+                            labels_and_codes=self.intern_strings(record["labels_and_codes"]),
+                            regions=self.intern_strings(record["regions"]),
+                            usages=self.intern_strings(record["usages"]),
+                            domains=self.intern_strings(record["domains"]),
+                            alt_terms=self.intern_strings(record["alt_terms"]),
+                            irregular_forms=self.intern_strings(record["irregular_forms"]))
+
+
+def parse_page_compact(html: bytes | str, 
+                       parser_backend: ParserBackend = "html.parser",
+                       pool: Optional[CompactPool] = None) -> list[COMPACT_SECTION_T]:
+    """
+    Same as parse_page(), but every dictionary section is returned as a flat list of
+    CompactSense. Takes several times less memory than the regular format.
+    Use compact_to_result() to convert result to the regular format.
+    """
+    if pool is None:
+        pool = CompactPool()
+    return [[pool.make_sense(make_sense_record(**sense_fields)) for sense_fields in senses]
+            for senses in _iter_sections(html, parser_backend)]
+
+
+def compact_to_sense_record(sense: CompactSense, dictionary_index: int = 0) -> SenseRecord:
+    header = sense.header
+    return {"dictionary_index":       dictionary_index,
+            "word":                   sense.word,
+            "POS":                    list(header.POS),
+            "definition":             sense.definition,
+            "definition_translation": sense.definition_translation,
+            "examples":               list(sense.examples),
+            "examples_translations":  list(sense.examples_translations),
+            "image_link":             sense.image_link,
+            "level":                  sense.level,
+            "labels_and_codes":       list(sense.labels_and_codes),
+            "regions":                list(sense.regions),
+            "usages":                 list(sense.usages),
+            "domains":                list(sense.domains),
+            "alt_terms":              list(sense.alt_terms),
+            "irregular_forms":        list(sense.irregular_forms),
+            "UK_IPA":                 list(header.UK_IPA),
+            "US_IPA":                 list(header.US_IPA),
+            "UK_audio_links":         list(header.UK_audio_links),
+            "US_audio_links":         list(header.US_audio_links)}
+
+
+def compact_to_result(sections: list[COMPACT_SECTION_T]) -> list[RESULT_FORMAT]:
+    """
+    Converts result of parse_page_compact() to the format of parse_page() without any loss
+    """
+    res: list[RESULT_FORMAT] = []
+    for dictionary_index, senses in enumerate(sections):
+        word_info: RESULT_FORMAT = {}
+        for sense in senses:
+            add_sense_record(word_info, compact_to_sense_record(sense, dictionary_index))
+        res.append(word_info)
+    return res
+
+
+def result_to_sense_records(result: list[RESULT_FORMAT]) -> Iterator[SenseRecord]:
+    """
+    Flattens result of parse_page()/define() into SenseRecord for every sense. Gives the same
+    records as iter_parse_page(), but senses of a section are grouped by word.
+    """
+    for dictionary_index, word_info in enumerate(result):
+        for word, pos_blocks in word_info.items():
+            for pos_block in pos_blocks:
+                data = pos_block["data"]
+                for i in range(len(data["definitions"])):
+                    yield {"dictionary_index":       dictionary_index,
+                           "word":                   word,
+                           "POS":                    pos_block["POS"],
+                           "definition":             data["definitions"][i],
+                           "definition_translation": data["definitions_translations"][i],
+                           "examples":               data["examples"][i],
+                           "examples_translations":  data["examples_translations"][i],
+                           "image_link":             data["image_links"][i],
+                           "level":                  data["levels"][i],
+                           "labels_and_codes":       data["labels_and_codes"][i],
+                           "regions":                data["regions"][i],
+                           "usages":                 data["usages"][i],
+                           "domains":                data["domains"][i],
+                           "alt_terms":              data["alt_terms"][i],
+                           "irregular_forms":        data["irregular_forms"][i],
+                           "UK_IPA":                 data["UK_IPA"][i],
+                           "US_IPA":                 data["US_IPA"][i],
+                           "UK_audio_links":         data["UK_audio_links"][i],
+                           "US_audio_links":         data["US_audio_links"][i]}
+
+
+def _is_known_missing(word: str,
+                      dictionary_type: DictionaryType,
+                      bilingual_vairation: BilingualVariations,
+                      cache: Optional[DiskCache]) -> bool:
+    """
+    Checks negative cache (see DiskCache.negative_ttl)
+    """
+    if cache is None or not cache.is_missing(make_cache_key(normalize_word(word), dictionary_type, bilingual_vairation)):
+        return False
+    observer = get_observer()
+    if observer is not None:
+        observer.on_count("negative_cache_hits")
+    return True
 
 
 def define(word: str, 
            dictionary_type: DictionaryType = "english",
            bilingual_vairation: BilingualVariations = "",
            request_headers: Optional[dict]=None,  
-           timeout:float=5.0) -> list[RESULT_FORMAT]:
+           timeout:float=5.0,
+           session: Optional[Transport]=None,
+           cache: Optional[DiskCache]=None,
+           parser_backend: ParserBackend="html.parser") -> list[RESULT_FORMAT]:
     """
     dictionary_type: Literal
     |   Type of monolingual english dictionary.
@@ -357,145 +1200,273 @@ def define(word: str,
     |       "turkish"
     |       "ukrainian"
     |       "vietnamese"
+
+    session: Transport
+    |   Optional session to reuse connections with (see make_session())
+
+    cache: cambridge_cache.DiskCache
+    |   Optional persistent page cache (see fetch_page())
+
+    parser_backend: Literal
+    |   HTML parser to use (see ParserBackend)
     """
-    if request_headers is None:
-        request_headers = DEFAULT_REQUESTS_HEADERS
-    
-    if bilingual_vairation:
-        link = f"{LINK_PREFIX}/dictionary/english-{bilingual_vairation}/{word}"
-    else:
-        link = f"{LINK_PREFIX}/dictionary/{dictionary_type}/{word}"
-    # will raise error if request_headers are None
-    page = requests.get(link, headers=request_headers, timeout=timeout)
+    if _is_known_missing(word, dictionary_type, bilingual_vairation, cache):
+        return []
+    page, is_successful = _fetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache)
+    res = parse_page(page, parser_backend=parser_backend)
+    if not res and is_successful and cache is not None:
+        cache.put_missing(make_cache_key(normalize_word(word), dictionary_type, bilingual_vairation))
+    return res
 
-    soup = bs4.BeautifulSoup(page.content, "html.parser")
-    # Only english dictionary
-    # word block which contains definitions for every POS_T.
-    primal_block = soup.find_all("div", {'class': 'di-body'})
-    res: list[RESULT_FORMAT] = []
-    for dictionary_index in range(len(primal_block)):
-        word_info: RESULT_FORMAT = {}
-        main_block = primal_block[dictionary_index].find_all("div", {"class": lambda x: "entry-body__el" in x if x is not None else False})
-        main_block.extend(primal_block[dictionary_index].find_all("div", {"class": "pr dictionary"}))
-        main_block.extend(primal_block[dictionary_index].find_all("div", {"class": "pv-block"}))
-        main_block.extend(primal_block[dictionary_index].find_all("div", {"class": "pr idiom-block"}))
-
-        for entity in main_block:
-            header_block = entity.find("div", {"class": "dpos-h"})
-            pos_alt_terms_list = get_alt_terms(header_block)
-            pos_irregular_forms_list = get_irregular_forms(header_block)
-
-            parsed_word_block = entity.find("h2", {"class": "headword"})
-            if parsed_word_block is None:
-                parsed_word_block = header_block.find("h2", {"class": "di-title"}) if header_block is not None else None
-            if parsed_word_block is None:
-                parsed_word_block = header_block.find("div", {"class": "di-title"}) if header_block is not None else None
-            header_word = parsed_word_block.text if parsed_word_block is not None else ""
-
-            pos_block = header_block.find_all("span", {"class": "pos dpos"}) if header_block is not None else []
-            pos = [] 
-            i = 0
-            while i < len(pos_block):
-                i_pos = pos_block[i].text
-                pos.append(i_pos)
-                if i_pos == "phrasal verb":  # after "phrasal verb" goes verb that was 
-                    i += 1                   # used in a construction of this phrasal verb. We skip it.
-                i += 1
-            uk_ipa, us_ipa, uk_audio_links, us_audio_links = get_phonetics(header_block)
-
-            # data gathered from the word header
-            pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains = get_tags(header_block)
-
-            for def_and_sent_block in entity.find_all("div", {'class': 'def-block ddef_block'}):
-                definition:                    DEFINITION_T       = ""
-                alt_terms:                     ALT_TERMS_T        = []
-                irregular_forms:               IRREGULAR_FORMS_T  = []
-                current_word_level:            LEVEL_T            = ""
-                current_word_labels_and_codes: LABELS_AND_CODES_T = []
-                current_word_regions:          REGIONS_T          = []
-                current_word_usages:           USAGES_T           = []
-                current_word_domains:          DOMAINS_T          = []
-
-                current_def_block_word = header_word
-
-                image_section = def_and_sent_block.find("div", {"class": "dimg"})
-                image_link = ""
-                if image_section is not None:
-                    image_link_block = image_section.find("amp-img")
-                    if image_link_block is not None:
-                        image_link = LINK_PREFIX + image_link_block.get("src", "")
-
-                # sentence examples
-                sentences_and_translation_block = def_and_sent_block.find("div", {"class": "def-body"})
-                definition_translation = ""
-                sentence_blocks = []
-                if sentences_and_translation_block is not None:
-                    definition_translation_block = sentences_and_translation_block.find(
-                        lambda tag: tag.name == "span" and any(class_attr == "trans" for class_attr in tag.attrs.get("class", []))) 
-                    definition_translation = definition_translation_block.text if definition_translation_block is not None else ""
-                    sentence_blocks = sentences_and_translation_block.find_all("div", {"class": "examp dexamp"})
-
-                examples = []
-                examples_translations = []
-                for item in sentence_blocks:
-                    sent_ex = item.find("span", {"class": "eg"})
-                    sent_translation = item.find("span", {"class": "trans"})
-                    examples.append(sent_ex.text if sent_ex is not None else "")
-                    examples_translations.append(sent_translation.text if sent_translation is not None else "")
-
-                found_definition_block = def_and_sent_block.find("div", {"class": "ddef_h"})
-
-                if found_definition_block is not None:
-                    found_definition_string = found_definition_block.find("div", {'class': "def ddef_d db"})
-                    definition = "" if found_definition_string is None else found_definition_string.text
-
-                    # Gathering specific tags for every word usage
-                    tag_section = found_definition_block.find("span", {"class": "def-info"})
-                    current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
-                        concatenate_tags(tag_section, pos_level, pos_labels_and_codes, pos_regions, pos_usages, pos_domains)
-
-                    alt_terms = get_alt_terms(found_definition_block)
-                    irregular_forms = get_irregular_forms(found_definition_block)
-
-                    phrase_block = found_definition_block.find_parent("div", {"class": "phrase-block"})
-                    if phrase_block is not None:
-                        phrase_tags_section = phrase_block.find("span", {"class": "phrase-info"})
-                        if phrase_tags_section is not None:
-                            alt_terms += get_alt_terms(phrase_tags_section)
-                            irregular_forms += get_irregular_forms(phrase_tags_section)
-
-                            current_word_level, current_word_labels_and_codes, current_word_regions, current_word_usages, current_word_domains = \
-                                concatenate_tags(phrase_tags_section,
-                                                current_word_level,
-                                                current_word_labels_and_codes,
-                                                current_word_regions,
-                                                current_word_usages,
-                                                current_word_domains)
-                        current_def_block_word = phrase_block.find("span", {"class": "phrase-title"}).text
-
-                update_word_dict(word_info,
-                                word=current_def_block_word,
-                                pos=pos,
-                                definition_translation=definition_translation,
-                                definition=definition,
-                                alt_terms=pos_alt_terms_list + alt_terms,
-                                irregular_forms=irregular_forms + pos_irregular_forms_list,
-                                examples=examples,
-                                examples_translations=examples_translations,
-                                level=current_word_level,
-                                labels_and_codes=current_word_labels_and_codes,
-                                regions=current_word_regions,
-                                usages=current_word_usages,
-                                domains=current_word_domains,
-                                image_link=image_link,
-                                uk_ipa=uk_ipa,
-                                us_ipa=us_ipa,
-                                uk_audio_links=uk_audio_links,
-                                us_audio_links=us_audio_links)
-        res.append(word_info)
+
+DEFINE_MANY_RESULT_T = tuple[WORD_T, Optional[list[RESULT_FORMAT]], Optional[Exception]]
+
+
+def retry_delay(attempt: int, backoff: float, retry_after: Optional[str]) -> float:
+    """
+    Seconds to wait before retrying a throttled or failed request: Retry-After header
+    if the server sent it, exponential backoff with jitter otherwise
+    """
+    import random
+
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:  # HTTP-date format is not worth supporting
+            pass
+    return backoff * 2 ** attempt * (0.5 + random.random())
+
+
+def map_concurrently(function: Callable[[Any], Any],
+                     items: Iterable[Any],
+                     max_workers: int) -> Iterator[tuple[Any, Any, Optional[Exception]]]:
+    """
+    Calls function on every item in max_workers threads. Yields (item, result, error) tuples
+    in completion order; if a call raises, result is None and error holds the exception.
+
+    items are consumed lazily (in the thread that iterates the generator): at most
+    2 * max_workers calls are in flight at once. Calls see the context of the caller,
+    e.g. the active observer (see cambridge_metrics.observe()). If the generator is
+    closed early, calls that haven't started yet are dropped.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    def collect(future: Future, item: Any) -> tuple[Any, Any, Optional[Exception]]:
+        error = future.exception()
+        if error is not None:
+            return item, None, error
+        return item, future.result(), None
+
+    in_flight: dict[Future, Any] = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in items:
+            # every call gets its own copy of the context
+            in_flight[executor.submit(contextvars.copy_context().run, function, item)] = item
+            if len(in_flight) < 2 * max_workers:
+                continue
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield collect(future, in_flight.pop(future))
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield collect(future, in_flight.pop(future))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _checked_define(word: str,
+                    dictionary_type: DictionaryType,
+                    bilingual_vairation: BilingualVariations,
+                    request_headers: Optional[dict],
+                    timeout: float,
+                    session: Optional[Transport],
+                    cache: Optional[DiskCache],
+                    parse: Callable[[bytes], list[RESULT_FORMAT]]) -> list[RESULT_FORMAT]:
+    """
+    define() of bulk lookups: an error response (429, 5xx, ...) raises requests.HTTPError
+    instead of being parsed to [], so that it is reported as the error of the word
+    """
+    if _is_known_missing(word, dictionary_type, bilingual_vairation, cache):
+        return []
+    page, is_successful = _fetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache)
+    if not is_successful:
+        import requests
+        raise requests.HTTPError(f"Error response to {get_link(normalize_word(word), dictionary_type, bilingual_vairation)}")
+    res = parse(page)
+    if not res and cache is not None:
+        cache.put_missing(make_cache_key(normalize_word(word), dictionary_type, bilingual_vairation))
     return res
 
 
+def iter_define(word: str,
+                dictionary_type: DictionaryType = "english",
+                bilingual_vairation: BilingualVariations = "",
+                request_headers: Optional[dict]=None,
+                timeout:float=5.0,
+                session: Optional[Transport]=None,
+                cache: Optional[DiskCache]=None,
+                parser_backend: ParserBackend="html.parser") -> Iterator[SenseRecord]:
+    """
+    Streaming version of define(). Arguments are the same as in define().
+    Yields SenseRecord for every sense of the page (see iter_parse_page()).
+    """
+    if _is_known_missing(word, dictionary_type, bilingual_vairation, cache):
+        return
+    page, is_successful = _fetch_page(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache)
+    found = False
+    for record in iter_parse_page(page, parser_backend=parser_backend):
+        found = True
+        yield record
+    if not found and is_successful and cache is not None:
+        cache.put_missing(make_cache_key(normalize_word(word), dictionary_type, bilingual_vairation))
+
+
+def define_many(words: Iterable[str],
+                dictionary_type: DictionaryType = "english",
+                bilingual_vairation: BilingualVariations = "",
+                request_headers: Optional[dict]=None,
+                timeout:float=5.0,
+                max_workers: int = 8,
+                session: Optional[Transport]=None,
+                cache: Optional[DiskCache]=None,
+                parser_backend: ParserBackend="html.parser") -> Iterator[DEFINE_MANY_RESULT_T]:
+    """
+    Bulk version of define(). Words are looked up by max_workers threads that share 
+    one session, so keep-alive connections are reused between requests.
+
+    Yields (word, result, error) tuples in completion order (not in the order of words).
+    If lookup of a word fails, result is None and error holds the raised exception
+    (requests.HTTPError for error responses such as 429 or 503); the rest of the batch is not affected.
+
+    words are consumed lazily: at most 2 * max_workers lookups are in flight at once.
+
+    session: Transport
+    |   Session to share between workers. Its connection pool should be at least
+    |   max_workers large. If None, one is created with make_session() and closed
+    |   when the generator finishes.
+
+    cache: cambridge_cache.DiskCache
+    |   Optional persistent page cache shared between workers (see fetch_page())
+    """
+    own_session = session is None
+    if session is None:
+        session = make_session(pool_size=max_workers)
+
+    def lookup(word: str) -> list[RESULT_FORMAT]:
+        return _checked_define(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache,
+                               lambda page: parse_page(page, parser_backend=parser_backend))
+
+    try:
+        yield from map_concurrently(lookup, words, max_workers)
+    finally:
+        if own_session:
+            session.close()
+
+
+def _share_equal_values(result: list[RESULT_FORMAT], pool: dict[Any, Any]) -> None:
+    """
+    Replaces values of POS blocks (IPA, audio links, examples, tags, ...) with equal values
+    already stored in pool, so that data repeated across dictionaries is kept once
+    """
+    for word_info in result:
+        for pos_blocks in word_info.values():
+            for pos_block in pos_blocks:
+                for field, values in pos_block["data"].items():
+                    for i, value in enumerate(values):
+                        key = (field, tuple(value)) if isinstance(value, list) else (field, value)
+                        values[i] = pool.setdefault(key, value)
+
+
+def _gather_phonetics(results: Iterable[list[RESULT_FORMAT]]) -> dict[WORD_T, HeadwordPhonetics]:
+    phonetics: dict[WORD_T, dict[str, dict[str, None]]] = {}
+    for result in results:
+        for word_info in result:
+            for word, pos_blocks in word_info.items():
+                headword_phonetics = phonetics.setdefault(word, {field: {} for field in HeadwordPhonetics.__annotations__})
+                for pos_block in pos_blocks:
+                    for field, unique_values in headword_phonetics.items():
+                        for values in pos_block["data"][field]:
+                            unique_values.update(dict.fromkeys(values))
+    return {word: {field: list(values) for field, values in headword_phonetics.items()}  # type: ignore
+            for word, headword_phonetics in phonetics.items()}
+
+
+def define_all_variations(word: str,
+                          variations: Optional[Iterable[BilingualVariations]]=None,
+                          dictionary_types: Iterable[DictionaryType]=(),
+                          request_headers: Optional[dict]=None,
+                          timeout:float=5.0,
+                          max_workers: int = 8,
+                          session: Optional[Transport]=None,
+                          cache: Optional[DiskCache]=None,
+                          parser_backend: ParserBackend="html.parser",
+                          parse_executor: Optional[Executor]=None) -> MultiDictionaryResult:
+    """
+    Looks word up in several dictionaries at once. Requests are sent concurrently
+    by max_workers threads over one session.
+
+    variations: Iterable
+    |   Bilingual variations to look up. If None, all of them are used (see BilingualVariations).
+
+    dictionary_types: Iterable
+    |   Monolingual dictionaries to look up (see DictionaryType)
+
+    parse_executor: concurrent.futures.Executor
+    |   Executor to parse pages in, e.g. ProcessPoolExecutor to parse them on several cores.
+    |   If None, pages are parsed by the threads that downloaded them.
+
+    Results are keyed by dictionary type / variation name. Values repeated across dictionaries
+    (IPA, audio links, English examples, tags, ...) are stored once and shared between results,
+    so they must not be mutated. A dictionary that failed is listed in errors instead.
+    """
+    if variations is None:
+        variations = [variation for variation in get_args(BilingualVariations) if variation]
+    dictionaries: list[tuple[DICTIONARY_KEY_T, DictionaryType, BilingualVariations]] = \
+        [(dictionary_type, dictionary_type, "") for dictionary_type in dictionary_types]
+    dictionaries += [(variation, "english", variation) for variation in variations if variation]
+
+    own_session = session is None
+    if session is None:
+        session = make_session(pool_size=max_workers)
+
+    def parse(page: bytes) -> list[RESULT_FORMAT]:
+        if parse_executor is None:
+            return parse_page(page, parser_backend=parser_backend)
+        return parse_executor.submit(parse_page, page, parser_backend).result()
+
+    def lookup(dictionary_type: DictionaryType, bilingual_vairation: BilingualVariations) -> list[RESULT_FORMAT]:
+        return _checked_define(word, dictionary_type, bilingual_vairation, request_headers, timeout, session, cache,
+                               parse)
+
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {key: executor.submit(contextvars.copy_context().run, lookup, dictionary_type, bilingual_vairation)
+                   for key, dictionary_type, bilingual_vairation in dictionaries}
+        wait(futures.values())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
+
+    merged: MultiDictionaryResult = {"word": word, "dictionaries": {}, "errors": {}, "phonetics": {}}
+    pool: dict[Any, Any] = {}
+    for key, future in futures.items():
+        error = future.exception()
+        if error is not None:
+            merged["errors"][key] = error
+            continue
+        result = future.result()
+        _share_equal_values(result, pool)
+        merged["dictionaries"][key] = result
+    merged["phonetics"] = _gather_phonetics(merged["dictionaries"].values())
+    return merged
+
+
 if __name__ == "__main__":
     from pprint import pprint
 
@@ -0,0 +1,220 @@
+"""
+Local stand-in of the dictionary site for load testing.
+
+Serves responses recorded with cambridge_transport (see make_record_replay_session()) with
+configurable latency, share of failing requests and 429 throttling:
+
+    python cambridge_server.py fixtures/ --port 8765 --latency 0.05 --jitter 0.02 --error-rate 0.01 --rate-limit 100
+
+    from cambridge_parser import define_many
+    from cambridge_server import run_server
+    from cambridge_transport import make_local_session
+
+    with run_server("fixtures/", latency=0.05, rate_limit=100) as server:
+        results = list(define_many(words, session=make_local_session(server.base_url)))
+    print(server.stats)
+"""
+import argparse
+import http.server
+import math
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from cambridge_parser import LINK_PREFIX
+from cambridge_transport import FixtureStore, conditional_response
+
+
+class Throttle:
+    """
+    Thread-safe token bucket: allows bursts of up to capacity requests
+    and rate requests per second on average (see cambridge_async.TokenBucket)
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate has to be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last_update = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> Optional[float]:
+        """
+        Takes a token. If there is none, returns number of seconds until the next one appears.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_update) * self.rate)
+            self._last_update = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate
+
+
+class _FixtureHandler(http.server.BaseHTTPRequestHandler):
+    # keep-alive connections, like the real site
+    protocol_version = "HTTP/1.1"
+    server: "FixtureServer"
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.count("requests")
+        delay = server.latency + server.jitter * server.random()
+        if delay > 0:
+            time.sleep(delay)
+
+        if server.throttle is not None:
+            retry_after = server.throttle.try_acquire()
+            if retry_after is not None:
+                server.count("throttled")
+                self._respond(429, {"Retry-After": str(math.ceil(retry_after))})
+                return
+        if server.random() < server.error_rate:
+            server.count("errors")
+            self._respond(503)
+            return
+
+        fixture = server.store.get(self.path)
+        if fixture is None:
+            server.count("not_found")
+            self._respond(404)
+            return
+        fixture = conditional_response(fixture, self.headers)
+        server.count("not_modified" if fixture.status == 304 else "served")
+        headers = dict(fixture.headers)
+        if "Location" in headers:
+            # relative redirect stays on this server
+            headers["Location"] = headers["Location"].removeprefix(LINK_PREFIX)
+        self._respond(fixture.status, headers, fixture.content)
+
+    def _respond(self, status: int, headers: Optional[dict[str, str]] = None, content: bytes = b"") -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FixtureServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP server that answers requests for <LINK_PREFIX>/<path> with fixture of /<path>.
+    Every request is handled in its own thread.
+
+    latency, jitter: float
+    |   Every response is delayed by latency + uniform(0, jitter) seconds
+
+    error_rate: float
+    |   Share of requests answered with 503
+
+    rate_limit: float
+    |   If set, requests above rate_limit per second (on average, bursts of up to burst
+    |   requests are allowed) are answered with 429 and Retry-After header
+
+    seed: int
+    |   Seed of latency jitter and errors
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 fixtures_dir: str,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 rate_limit: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 seed: Optional[int] = None,
+                 verbose: bool = False):
+        super().__init__((host, port), _FixtureHandler)
+        self.store = FixtureStore(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle = Throttle(rate_limit, burst) if rate_limit is not None else None
+        self.verbose = verbose
+        self.random = random.Random(seed).random
+        self._stats: dict[str, int] = {"requests": 0, "served": 0, "not_modified": 0,
+                                       "not_found": 0, "errors": 0, "throttled": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+@contextmanager
+def run_server(fixtures_dir: str, **server_kwargs) -> Iterator[FixtureServer]:
+    """
+    Runs FixtureServer in a background thread. By default it listens on a free port (see base_url).
+    """
+    server = FixtureServer(fixtures_dir, **server_kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serves recorded dictionary pages for load testing")
+    parser.add_argument("fixtures", help="directory with responses recorded by cambridge_transport")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay of every response in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximal random addition to latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="requests per second above which 429 is returned")
+    parser.add_argument("--burst", type=float, default=None, help="number of requests allowed at once")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    server = FixtureServer(args.fixtures,
+                           host=args.host,
+                           port=args.port,
+                           latency=args.latency,
+                           jitter=args.jitter,
+                           error_rate=args.error_rate,
+                           rate_limit=args.rate_limit,
+                           burst=args.burst,
+                           seed=args.seed,
+                           verbose=args.verbose)
+    print(f"serving {args.fixtures} on {server.base_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.stats, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Transports (see cambridge_parser.Transport) that don't depend on the real site.
+
+Pages can be recorded once and then replayed without network:
+
+    from cambridge_parser import define
+    from cambridge_transport import make_record_replay_session
+
+    define("run", session=make_record_replay_session("fixtures/", mode="record"))  # requested and saved
+    define("run", session=make_record_replay_session("fixtures/"))                 # read from fixtures/
+
+or served by a local stand-in of the site (see cambridge_server) that requests are sent to:
+
+    define("run", session=make_local_session("http://127.0.0.1:8765"))
+
+Only requests to LINK_PREFIX are affected. Other requests (e.g. of audio files) are sent as usual.
+"""
+import gzip
+import io
+import json
+import pathlib
+import urllib.parse
+from typing import Literal, NamedTuple, Optional
+
+import requests
+import requests.adapters
+import urllib3
+
+from cambridge_parser import LINK_PREFIX, make_session
+
+
+ReplayMode = Literal["replay", "record", "auto"]
+
+# the body is stored decoded, so transfer-related headers (Content-Encoding, Content-Length, ...) are dropped
+FIXTURE_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Location")
+
+
+class Fixture(NamedTuple):
+    status:  int
+    reason:  str
+    headers: dict[str, str]
+    content: bytes
+
+
+class MissingFixtureError(requests.RequestException):
+    pass
+
+
+def conditional_response(fixture: Fixture, request_headers) -> Fixture:
+    """
+    Returns 304 response without body if request_headers (a case-insensitive mapping)
+    have validators that match the fixture, otherwise the fixture itself
+    """
+    etag = fixture.headers.get("ETag")
+    last_modified = fixture.headers.get("Last-Modified")
+    if etag is not None and request_headers.get("If-None-Match") == etag or \
+            last_modified is not None and request_headers.get("If-Modified-Since") == last_modified:
+        return Fixture(304, "Not Modified", fixture.headers, b"")
+    return fixture
+
+
+class FixtureStore:
+    """
+    Directory of recorded responses. Response to <LINK_PREFIX>/dictionary/english/run is stored as
+    dictionary/english/run.json (status and headers) and dictionary/english/run.html.gz (body),
+    so pages of the directory can also be parsed with cambridge_batch.iter_directory().
+    """
+    def __init__(self, root: str):
+        self.root = pathlib.Path(root)
+
+    def path_for(self, url: str) -> pathlib.Path:
+        """
+        Path of the fixture of url without extension. url may also be just a path with query.
+        """
+        parts = urllib.parse.urlsplit(url)
+        name = urllib.parse.unquote(parts.path).strip("/")
+        if parts.query:
+            name += "%3F" + urllib.parse.quote(parts.query, safe="")
+        if any(part in ("", ".", "..") for part in name.split("/")):
+            raise ValueError(f"Can't store response to {url}")
+        return self.root / name
+
+    def get(self, url: str) -> Optional[Fixture]:
+        path = self.path_for(url)
+        meta_path = path.with_name(path.name + ".json")
+        if not meta_path.exists():
+            return None
+        with open(meta_path, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        body_path = path.with_name(path.name + ".html.gz")
+        content = gzip.decompress(body_path.read_bytes()) if body_path.exists() else b""
+        return Fixture(meta["status"], meta["reason"], meta["headers"], content)
+
+    def put(self, url: str, fixture: Fixture) -> None:
+        path = self.path_for(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body_path = path.with_name(path.name + ".html.gz")
+        if fixture.content:
+            body_path.write_bytes(gzip.compress(fixture.content, mtime=0))
+        elif body_path.exists():
+            body_path.unlink()
+        # metadata is written last: fixture is visible only when it is complete
+        with open(path.with_name(path.name + ".json"), "w", encoding="utf-8") as meta_file:
+            json.dump({"status": fixture.status, "reason": fixture.reason, "headers": fixture.headers}, meta_file)
+
+
+class RecordReplayAdapter(requests.adapters.HTTPAdapter):
+    """
+    Transport adapter that serves responses from a FixtureStore.
+
+    mode: Literal
+    |   "replay" - only recorded responses are returned; MissingFixtureError is raised for the rest
+    |   "record" - requests are sent and successful and client error responses are recorded
+    |   "auto"   - recorded responses are returned, the rest are requested and recorded
+
+    Replayed responses honour conditional requests (If-None-Match / If-Modified-Since),
+    so they work with cambridge_cache.DiskCache revalidation. Redirects are recorded hop by hop
+    and followed by the session as usual.
+    """
+    def __init__(self, store: FixtureStore, mode: ReplayMode = "replay", **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.mode = mode
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None) -> requests.Response:
+        if self.mode != "record":
+            fixture = self.store.get(request.url)
+            if fixture is not None:
+                return self._replay(request, conditional_response(fixture, request.headers))
+            if self.mode == "replay":
+                raise MissingFixtureError(f"No recorded response to {request.url}", request=request)
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        # throttling and server errors are transient, and 304 says nothing about the page
+        if response.status_code < 500 and response.status_code not in (304, 429):
+            headers = {name: response.headers[name] for name in FIXTURE_HEADERS if name in response.headers}
+            self.store.put(request.url, Fixture(response.status_code, response.reason or "", headers, response.content))
+        return response
+
+    def _replay(self, request, fixture: Fixture) -> requests.Response:
+        raw = urllib3.HTTPResponse(body=io.BytesIO(fixture.content),
+                                   headers=fixture.headers,
+                                   status=fixture.status,
+                                   reason=fixture.reason,
+                                   preload_content=False,
+                                   decode_content=False)
+        return self.build_response(request, raw)
+
+
+class LocalServerAdapter(requests.adapters.HTTPAdapter):
+    """
+    Transport adapter that sends requests to base_url instead of LINK_PREFIX.
+    Responses keep the original urls, so the rest of the code can't tell them apart.
+    """
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None) -> requests.Response:
+        local_request = request.copy()
+        local_request.url = self.base_url + request.url[len(LINK_PREFIX):]
+        response = super().send(local_request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def make_record_replay_session(fixtures_dir: str, mode: ReplayMode = "replay", pool_size: int = 10) -> requests.Session:
+    """
+    make_session() whose requests to LINK_PREFIX go through RecordReplayAdapter
+    """
+    session = make_session(pool_size=pool_size)
+    session.mount(LINK_PREFIX, RecordReplayAdapter(FixtureStore(fixtures_dir), mode,
+                                                   pool_connections=1, pool_maxsize=pool_size))
+    return session
+
+
+def make_local_session(base_url: str, pool_size: int = 10) -> requests.Session:
+    """
+    make_session() whose requests to LINK_PREFIX are sent to base_url (e.g. of cambridge_server)
+    """
+    session = make_session(pool_size=pool_size)
+    session.mount(LINK_PREFIX, LocalServerAdapter(base_url, pool_connections=1, pool_maxsize=pool_size))
+    return session
@@ -0,0 +1,107 @@
+"""
+Resuming of interrupted asset downloads (cambridge_assets.AssetStore.download)
+"""
+import hashlib
+import pathlib
+from typing import Optional
+
+import pytest
+import requests
+
+from cambridge_assets import AssetStore
+
+
+LINK = "https://dictionary.cambridge.org/media/english/uk_pron/run.mp3"
+
+
+class _Body:
+    """
+    Raw response body that breaks the connection after fail_after bytes
+    """
+    def __init__(self, content: bytes, fail_after: Optional[int]):
+        self.content = content
+        self.fail_after = fail_after
+        self.position = 0
+
+    def read(self, size: int = -1, **kwargs) -> bytes:
+        if self.fail_after is not None and self.position >= self.fail_after:
+            raise requests.ConnectionError("connection reset")
+        end = len(self.content) if size < 0 else self.position + size
+        if self.fail_after is not None:
+            end = min(end, self.fail_after)
+        chunk = self.content[self.position:end]
+        self.position += len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        pass
+
+
+class RemoteFile:
+    """
+    Session serving one file with Range and If-Range support
+    """
+    def __init__(self, content: bytes, etag: str):
+        self.content = content
+        self.etag = etag
+        self.fail_after: Optional[int] = None
+        self.requests: list[dict] = []
+
+    def get(self, link: str, headers: dict, timeout: float, stream: bool) -> requests.Response:
+        self.requests.append(headers)
+        response = requests.Response()
+        response.url = link
+        response.headers["ETag"] = self.etag
+        content = self.content
+        response.status_code = 200
+        if "Range" in headers and headers.get("If-Range", self.etag) == self.etag:
+            start = int(headers["Range"][len("bytes="):-1])
+            content = content[start:]
+            response.status_code = 206
+            response.headers["Content-Range"] = f"bytes {start}-{len(self.content) - 1}/{len(self.content)}"
+        response.raw = _Body(content, self.fail_after)
+        return response
+
+
+def interrupted_download(store: AssetStore, remote: RemoteFile, fail_after: int) -> None:
+    remote.fail_after = fail_after
+    with pytest.raises(requests.ConnectionError):
+        store.download(LINK, remote, chunk_size=4)  # type: ignore
+    remote.fail_after = None
+
+
+def stored_content(store: AssetStore) -> bytes:
+    path = store.path_for(LINK)
+    assert path is not None
+    return pathlib.Path(path).read_bytes()
+
+
+def test_download_is_resumed(tmp_path):
+    content = bytes(range(256)) * 4
+    remote = RemoteFile(content, '"v1"')
+    with AssetStore(str(tmp_path)) as store:
+        interrupted_download(store, remote, 100)
+        store.download(LINK, remote)  # type: ignore
+        assert stored_content(store) == content
+        assert pathlib.Path(store.path_for(LINK)).stem == hashlib.sha256(content).hexdigest()
+    assert remote.requests[-1]["Range"] == "bytes=100-"
+    assert remote.requests[-1]["If-Range"] == '"v1"'
+    assert not any(store.partial_dir.iterdir())
+
+
+def test_changed_file_is_downloaded_again(tmp_path):
+    remote = RemoteFile(b"old content " * 50, '"v1"')
+    with AssetStore(str(tmp_path)) as store:
+        interrupted_download(store, remote, 100)
+        remote.content, remote.etag = b"new content " * 60, '"v2"'
+        store.download(LINK, remote)  # type: ignore
+        assert stored_content(store) == remote.content
+
+
+def test_partial_file_without_validator_is_not_resumed(tmp_path):
+    remote = RemoteFile(b"content " * 100, 'W/"weak"')
+    with AssetStore(str(tmp_path)) as store:
+        interrupted_download(store, remote, 100)
+        store.download(LINK, remote)  # type: ignore
+        assert stored_content(store) == remote.content
+    assert "Range" not in remote.requests[-1]
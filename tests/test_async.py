@@ -0,0 +1,42 @@
+"""
+Async lookups against the local stand-in of the site (cambridge_server)
+"""
+import asyncio
+import pathlib
+
+import aiohttp
+
+from cambridge_async import LocalAsyncSession, adefine_many
+from cambridge_parser import define_many
+from cambridge_server import run_server
+from cambridge_transport import make_local_session
+
+
+FIXTURES_DIR = str(pathlib.Path(__file__).resolve().parent / "fixtures")
+
+
+async def collect(base_url: str, words: list[str], **kwargs) -> dict:
+    async with LocalAsyncSession(base_url) as session:
+        return {word: (result, error) async for word, result, error in adefine_many(words, session=session, **kwargs)}
+
+
+def test_adefine_many_agrees_with_define_many():
+    words = ["run", "xyzzy", "unknown"]
+    with run_server(FIXTURES_DIR) as server:
+        async_results = asyncio.run(collect(server.base_url, words))
+        session = make_local_session(server.base_url)
+        results = {word: (result, error) for word, result, error in define_many(words, session=session)}
+    for word in words:
+        result, error = results[word]
+        async_result, async_error = async_results[word]
+        assert async_result == result
+        assert (async_error is None) == (error is None)
+    assert isinstance(async_results["unknown"][1], aiohttp.ClientResponseError)
+
+
+def test_adefine_many_reports_error_responses():
+    with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+        results = asyncio.run(collect(server.base_url, ["run"], max_retries=1))
+    result, error = results["run"]
+    assert result is None
+    assert isinstance(error, aiohttp.ClientResponseError) and error.status == 503
@@ -0,0 +1,99 @@
+"""
+Crawling into a dump and lookups from it, against the local stand-in of the site
+(cambridge_server) serving the fixtures of test_local_server.py
+"""
+import pathlib
+import shutil
+
+import cambridge_dump
+from cambridge_cache import DiskCache
+from cambridge_dump import DumpBuilder, LocalDictionary
+from cambridge_parser import get_link, parse_page
+from cambridge_server import run_server
+from cambridge_transport import FixtureStore, make_local_session
+
+
+FIXTURES_DIR = str(pathlib.Path(__file__).resolve().parent / "fixtures")
+
+
+def crawl_from(server, monkeypatch, path: str, words: list[str], **crawl_kwargs) -> dict[str, dict[str, int]]:
+    monkeypatch.setattr(cambridge_dump, "make_session",
+                        lambda pool_size: make_local_session(server.base_url, pool_size=pool_size))
+    with DumpBuilder(path) as builder:
+        builder.add_words(words)
+        list(builder.crawl(delay=0, **crawl_kwargs))
+        return builder.progress()
+
+
+def test_error_responses_are_failed(tmp_path, monkeypatch):
+    with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+        progress = crawl_from(server, monkeypatch, str(tmp_path / "dump.db"), ["run", "set"])
+    assert progress == {"pending": 0, "done": 0, "failed": 2}
+
+
+def test_unknown_word_is_failed(tmp_path, monkeypatch):
+    with run_server(FIXTURES_DIR) as server:
+        progress = crawl_from(server, monkeypatch, str(tmp_path / "dump.db"), ["run", "unknown"])
+    assert progress == {"pending": 0, "done": 1, "failed": 1}
+
+
+def test_throttled_requests_are_retried(tmp_path, monkeypatch):
+    with run_server(FIXTURES_DIR, rate_limit=2, burst=1) as server:
+        progress = crawl_from(server, monkeypatch, str(tmp_path / "dump.db"), ["run", "set", "test"], max_workers=3)
+    assert progress == {"pending": 0, "done": 3, "failed": 0}
+    assert server.stats["throttled"] > 0
+
+
+def test_lookups_are_normalized(tmp_path, monkeypatch):
+    path = str(tmp_path / "dump.db")
+    with run_server(FIXTURES_DIR) as server:
+        crawl_from(server, monkeypatch, path, ["Run", " SET "])
+    with LocalDictionary(path) as dictionary:
+        assert sorted(dictionary.words()) == ["run", "set"]
+        assert "RUN" in dictionary
+        assert dictionary.define("Run") == dictionary.define("run") != []
+        # headword of the run page
+        assert dictionary.define("Run Up") == dictionary.define("run")
+
+
+def test_refresh_after_crawl_downloads_nothing(tmp_path, monkeypatch):
+    path = str(tmp_path / "dump.db")
+    with run_server(FIXTURES_DIR) as server:
+        crawl_from(server, monkeypatch, path, ["run", "set", "test"])
+        with DumpBuilder(path) as builder:
+            assert all(error is None and diff is None for _, diff, error in builder.refresh(delay=0))
+        assert server.stats["served"] == 3
+        assert server.stats["not_modified"] == 3
+
+
+def test_crawl_uses_cache(tmp_path, monkeypatch):
+    with DiskCache(str(tmp_path / "cache.db")) as cache:
+        with run_server(FIXTURES_DIR) as server:
+            crawl_from(server, monkeypatch, str(tmp_path / "first.db"), ["run", "set"], cache=cache)
+            progress = crawl_from(server, monkeypatch, str(tmp_path / "second.db"), ["run", "set"], cache=cache)
+        assert server.stats["requests"] == 2
+    assert progress == {"pending": 0, "done": 2, "failed": 0}
+    with LocalDictionary(str(tmp_path / "first.db")) as first, LocalDictionary(str(tmp_path / "second.db")) as second:
+        assert first.define("run") == second.define("run") != []
+
+
+def test_reordered_senses_are_stored(tmp_path, monkeypatch):
+    fixtures_dir = str(tmp_path / "fixtures")
+    shutil.copytree(FIXTURES_DIR, fixtures_dir)
+    path = str(tmp_path / "dump.db")
+    with run_server(fixtures_dir) as server:
+        crawl_from(server, monkeypatch, path, ["run"])
+
+        # swap the first two senses of the first entry
+        store = FixtureStore(fixtures_dir)
+        fixture = store.get(get_link("run"))
+        marker = b'<div class="def-block ddef_block "'
+        parts = fixture.content.split(marker)
+        parts[1], parts[2] = parts[2], parts[1]
+        content = marker.join(parts)
+        store.put(get_link("run"), fixture._replace(headers={**fixture.headers, "ETag": '"run-2"'}, content=content))
+
+        with DumpBuilder(path) as builder:
+            assert [(error, diff) for _, diff, error in builder.refresh(delay=0)] == [(None, None)]
+    with LocalDictionary(path) as dictionary:
+        assert dictionary.define("run") == parse_page(content) != parse_page(fixture.content)
@@ -0,0 +1,43 @@
+"""
+Round trips of exported senses (cambridge_export)
+"""
+import json
+import pathlib
+
+import pytest
+
+from cambridge_export import SenseWriter, open_writer, read_arrow, read_jsonl, read_parquet
+from cambridge_parser import get_link, iter_parse_page
+from cambridge_transport import FixtureStore
+
+
+FIXTURES_DIR = str(pathlib.Path(__file__).resolve().parent / "fixtures")
+
+
+@pytest.fixture
+def records() -> list:
+    fixture = FixtureStore(FIXTURES_DIR).get(get_link("run"))
+    assert fixture is not None
+    # tuples of records become lists, like in every exported format
+    return json.loads(json.dumps(list(iter_parse_page(fixture.content)), ensure_ascii=False))
+
+
+def test_writers_are_abstract():
+    with pytest.raises(TypeError):
+        SenseWriter()  # type: ignore
+
+
+def test_jsonl(tmp_path, records):
+    path = str(tmp_path / "senses.jsonl")
+    with open_writer(path) as writer:
+        writer.write_many(records)
+    assert list(read_jsonl(path)) == records
+
+
+@pytest.mark.parametrize("extension, read", [(".parquet", read_parquet), (".arrow", read_arrow)])
+def test_columnar(tmp_path, records, extension, read):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"senses{extension}")
+    with open_writer(path, batch_size=10) as writer:
+        writer.write_many(records)
+    assert read(path).to_pylist() == records
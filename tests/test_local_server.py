@@ -0,0 +1,142 @@
+"""
+Lookups against the local stand-in of the site (cambridge_server) serving fixtures/:
+synthetic pages of run, set and test (benchmarks/synthetic_pages.py), xyzzy without
+definitions and running that redirects to run.
+"""
+import pathlib
+
+import pytest
+import requests
+
+from cambridge_cache import DiskCache, MemoryCache
+from cambridge_metrics import StatsCollector, observe
+from cambridge_parser import define, define_many, get_link, make_cache_key, parse_page
+from cambridge_server import run_server
+from cambridge_transport import FixtureStore, MissingFixtureError, make_local_session, make_record_replay_session
+
+
+FIXTURES_DIR = str(pathlib.Path(__file__).resolve().parent / "fixtures")
+
+
+def expected(word: str) -> list:
+    fixture = FixtureStore(FIXTURES_DIR).get(get_link(word))
+    assert fixture is not None
+    return parse_page(fixture.content)
+
+
+@pytest.fixture
+def server():
+    with run_server(FIXTURES_DIR) as server:
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_define_many(server):
+    session = make_local_session(server.base_url, pool_size=4)
+    results = {word: (result, error) for word, result, error in define_many(["run", "set", "test"] * 3,
+                                                                           max_workers=4,
+                                                                           session=session)}
+    for word in ("run", "set", "test"):
+        result, error = results[word]
+        assert error is None
+        assert result and result == expected(word)
+    assert server.stats["served"] == 9
+
+
+def test_define_many_reports_error_responses():
+    with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+        session = make_local_session(server.base_url)
+        results = list(define_many(["run", "set"], session=session))
+    assert len(results) == 2
+    for _, result, error in results:
+        assert result is None
+        assert isinstance(error, requests.HTTPError)
+
+
+def test_define_many_reports_throttling():
+    with run_server(FIXTURES_DIR, rate_limit=1, burst=1) as server:
+        session = make_local_session(server.base_url)
+        errors = [error for _, _, error in define_many(["run", "set", "test"], max_workers=3, session=session)]
+    assert errors.count(None) == 1
+    assert server.stats["throttled"] == 2
+
+
+def test_unknown_word_is_reported(server):
+    [(_, result, error)] = define_many(["unknown"], session=make_local_session(server.base_url))
+    assert result is None
+    assert isinstance(error, requests.HTTPError)
+
+
+def test_cache_hit(server, cache):
+    session = make_local_session(server.base_url)
+    assert define("run", session=session, cache=cache) == expected("run")
+    assert define("run", session=session, cache=cache) == expected("run")
+    assert server.stats["requests"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_revalidated(server, tmp_path):
+    session = make_local_session(server.base_url)
+    with DiskCache(str(tmp_path / "cache.db"), ttl=0) as cache:
+        define("run", session=session, cache=cache)
+        assert define("run", session=session, cache=cache) == expected("run")
+        assert cache.stats()["revalidated"] == 1
+    assert server.stats["not_modified"] == 1
+
+
+def test_stale_entry_is_used_if_revalidation_fails(tmp_path):
+    with DiskCache(str(tmp_path / "cache.db"), ttl=0) as cache:
+        with run_server(FIXTURES_DIR) as server:
+            define("run", session=make_local_session(server.base_url), cache=cache)
+        with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+            with observe(StatsCollector()) as stats:
+                result = define("run", session=make_local_session(server.base_url), cache=cache)
+    assert result == expected("run")
+    assert stats.counters["cache_stale_if_error"] == 1
+
+
+def test_negative_cache(server, cache):
+    session = make_local_session(server.base_url)
+    assert define("xyzzy", session=session, cache=cache) == []
+    assert define("xyzzy", session=session, cache=cache) == []
+    assert server.stats["requests"] == 1
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_error_response_is_not_cached_as_missing(cache):
+    with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+        assert define("run", session=make_local_session(server.base_url), cache=cache) == []
+    assert not cache.is_missing(make_cache_key("run", "english", ""))
+
+
+def test_redirect_is_remembered(server, cache):
+    session = make_local_session(server.base_url)
+    assert define("Running", session=session, cache=cache) == expected("run")
+    assert cache.resolve(make_cache_key("running", "english", "")) == make_cache_key("run", "english", "")
+    requests_sent = server.stats["requests"]
+    assert define("running", session=session, cache=cache) == expected("run")
+    assert define("run", session=session, cache=cache) == expected("run")
+    assert server.stats["requests"] == requests_sent
+
+
+def test_replay():
+    session = make_record_replay_session(FIXTURES_DIR)
+    assert define("running", session=session) == expected("run")
+    with pytest.raises(MissingFixtureError):
+        define("unknown", session=session)
+
+
+def test_memory_cache_does_not_store_error_responses():
+    memo = MemoryCache()
+    with run_server(FIXTURES_DIR, error_rate=1.0) as server:
+        with pytest.raises(requests.HTTPError):
+            memo.define("run", session=make_local_session(server.base_url))
+    with run_server(FIXTURES_DIR) as server:
+        assert memo.define("run", session=make_local_session(server.base_url)) == expected("run")
+        assert server.stats["requests"] == 1
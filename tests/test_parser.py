@@ -0,0 +1,73 @@
+"""
+Parsing of the fixture pages with every parser backend.
+
+expected/<dictionary>/<word>.json are results of pages of fixtures/ and of the benchmark
+corpus (benchmarks/fixtures/) produced by the parser before its single-pass rewrite.
+They are a fixed reference: update them only for intended changes of the output.
+"""
+import json
+import pathlib
+from typing import Any, get_args
+
+import pytest
+
+from cambridge_parser import (CompactPool, ParserBackend, add_sense_record, compact_to_result, get_link,
+                              iter_parse_page, parse_page, parse_page_compact, parse_page_if_changed)
+from cambridge_transport import FixtureStore
+
+
+TESTS_DIR = pathlib.Path(__file__).resolve().parent
+FIXTURES_DIR = str(TESTS_DIR / "fixtures")
+BENCHMARK_FIXTURES_DIR = str(TESTS_DIR.parent / "benchmarks" / "fixtures")
+EXPECTED_DIR = TESTS_DIR / "expected"
+
+# (fixtures directory, dictionary_type, bilingual_variation, word)
+EXPECTED_PAGES = [(FIXTURES_DIR, "english", "", "run"),
+                  (FIXTURES_DIR, "english", "", "xyzzy"),
+                  (BENCHMARK_FIXTURES_DIR, "english", "", "colour"),
+                  (BENCHMARK_FIXTURES_DIR, "english", "", "give-up"),
+                  (BENCHMARK_FIXTURES_DIR, "english", "", "break-the-ice"),
+                  (BENCHMARK_FIXTURES_DIR, "english", "russian", "test")]
+
+
+def fixture_page(word: str, dictionary_type: str = "english", bilingual_vairation: str = "",
+                 fixtures_dir: str = FIXTURES_DIR) -> bytes:
+    fixture = FixtureStore(fixtures_dir).get(get_link(word, dictionary_type, bilingual_vairation))  # type: ignore
+    assert fixture is not None
+    return fixture.content
+
+
+def as_json(result: Any) -> Any:
+    # tuples of the result become lists, like in the stored files
+    return json.loads(json.dumps(result, ensure_ascii=False))
+
+
+def from_records(html: bytes, parser_backend: ParserBackend, sections: int) -> list:
+    result: list = [{} for _ in range(sections)]
+    for record in iter_parse_page(html, parser_backend=parser_backend):
+        add_sense_record(result[record["dictionary_index"]], record)
+    return result
+
+
+@pytest.mark.parametrize("parser_backend", get_args(ParserBackend))
+@pytest.mark.parametrize("fixtures_dir, dictionary_type, bilingual_vairation, word", EXPECTED_PAGES,
+                         ids=[f"{bilingual_vairation or dictionary_type}/{word}"
+                              for _, dictionary_type, bilingual_vairation, word in EXPECTED_PAGES])
+def test_expected_result(fixtures_dir, dictionary_type, bilingual_vairation, word, parser_backend):
+    html = fixture_page(word, dictionary_type, bilingual_vairation, fixtures_dir)
+    dictionary = f"english-{bilingual_vairation}" if bilingual_vairation else dictionary_type
+    expected = json.loads((EXPECTED_DIR / dictionary / f"{word}.json").read_text(encoding="utf-8"))
+
+    assert as_json(parse_page(html, parser_backend=parser_backend)) == expected
+    assert as_json(compact_to_result(parse_page_compact(html, parser_backend, CompactPool()))) == expected
+    assert as_json(from_records(html, parser_backend, len(expected))) == expected
+
+
+@pytest.mark.parametrize("parser_backend", get_args(ParserBackend))
+def test_sections_hash_ignores_markup_between_sections(parser_backend):
+    page = fixture_page("run")
+    with_banner = page.replace(b'</div><div class="di-body">', b'</div>ad banner<div class="di-body">', 1)
+    assert with_banner != page
+    sections_hash, result = parse_page_if_changed(page, parser_backend=parser_backend)
+    assert result
+    assert parse_page_if_changed(with_banner, sections_hash, parser_backend) == (sections_hash, None)